@@ -1,53 +1,125 @@
 import os
+import sys
+import argparse
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from results_store import STORE_DIR, write_results, export_excel
+from ground_truth_index import GROUND_TRUTH_FILE, GroundTruthIndex, report_coverage
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, "python_ollama_code"))
+from runner import MODEL_MATRIX, resolve_output
 
 # Define file paths
-csv_folder = "python_ollama_code"
-results_folder = "results"  # Folder to store results
-ground_truth_file = "ground_truth/list_50.xlsx"
+CSV_FOLDER = os.path.join(ROOT_DIR, "python_ollama_code")
+RESULTS_FOLDER = os.path.join(ROOT_DIR, "results")  # Folder to store results
+
+
+def load_ground_truth(path=GROUND_TRUTH_FILE):
+    """Loads the ground truth once as a GroundTruthIndex."""
+    return GroundTruthIndex.load(path)
+
+
+def score_predictions(pred_df, gt_index):
+    """
+    Aligns predictions with the ground truth and adds accuracy, absolute and signed error.
+    All columns stay numeric: a missing prediction or truth, or a zero truth for the
+    accuracy ratio, gives NaN instead of a placeholder string.
+    """
+    # Keep only the prediction columns (newer outputs also carry model, latency, raw response...)
+    merged_df = pred_df[["filename", "number_of_people"]].copy()
+    merged_df["number_of_people"] = pd.to_numeric(merged_df["number_of_people"], errors="coerce")
+
+    # Look the ground truth up by document ID instead of merging
+    truth = gt_index.align(merged_df["filename"])
+    merged_df["Truth"] = truth
+
+    predicted = merged_df["number_of_people"].to_numpy(dtype=float)
+    error = predicted - truth
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accuracy = np.where(truth != 0, predicted / truth * 100, np.nan)
+
+    merged_df["Accuracy (%)"] = np.round(accuracy, 2)
+    merged_df["Absolute Error"] = np.abs(error)
+    merged_df["Signed Error"] = error
+    return merged_df
+
+
+def identify_run(csv_path, pred_df):
+    """
+    (model, run) of a prediction file. A matrix output is named after its matrix entry;
+    any other file after its name without "_output". The model comes from the rows
+    or, for older files, from the matrix.
+    """
+    spec = next((spec for spec in MODEL_MATRIX
+                 if os.path.abspath(resolve_output(spec)) == os.path.abspath(csv_path)), None)
+    run = spec["name"] if spec else os.path.basename(csv_path)[:-len(".csv")].removesuffix("_output")
+    if "model" in pred_df.columns and pred_df["model"].notna().any():
+        return pred_df["model"].dropna().iloc[0], run
+    return (spec["model"] if spec else run), run
 
-# Create results folder if it does not exist
-os.makedirs(results_folder, exist_ok=True)
 
-print(f"Processing CSV files from: {csv_folder}")
-print(f"Ground truth file: {ground_truth_file}")
+def process_csv(csv_path, gt_index, store_dir=STORE_DIR):
+    """
+    Scores one prediction CSV and stores it under its (model, run) partition; returns that pair.
+    When a file was predicted twice (appended reruns), only the last prediction is stored.
+    """
+    pred_df = pd.read_csv(csv_path)
+    model, run = identify_run(csv_path, pred_df)
+    report_coverage(run, gt_index.coverage(pred_df["filename"]))
+    pred_df = pred_df.drop_duplicates("filename", keep="last")
+    merged_df = score_predictions(pred_df, gt_index)
+    write_results(merged_df, model, run, store_dir)
 
-# Load ground truth Excel file
-gt_df = pd.read_excel(ground_truth_file)
-print(gt_df)
+    missing = int(merged_df["number_of_people"].isna().sum())
+    print(f"Results stored: {model}/{run}" + (f" ({missing} missing prediction(s))" if missing else ""))
+    return model, run
 
-# Ensure proper column names
-gt_df.columns = ["filename", "Truth"]
-print(f"Ground truth columns: {gt_df.columns}")
 
-# Loop through each CSV file in python_ollama_code
-for csv_file in os.listdir(csv_folder):
-    if csv_file.endswith(".csv"):
-        csv_path = os.path.join(csv_folder, csv_file)
+def list_csv_files(csv_folder=CSV_FOLDER):
+    """Prediction CSVs of a folder, sorted by name."""
+    return [os.path.join(csv_folder, csv_file) for csv_file in sorted(os.listdir(csv_folder))
+            if csv_file.endswith(".csv")]
 
-        # Load CSV file
-        pred_df = pd.read_csv(csv_path)
-        print(f"Processing file: {csv_file}")
-        print(pred_df)
 
-        # Ensure proper column names
-        pred_df.columns = ["filename", "number_of_people"]
+def process_folder(csv_folder=CSV_FOLDER, store_dir=STORE_DIR, ground_truth_file=GROUND_TRUTH_FILE,
+                   workers=None, csv_paths=None):
+    """
+    Scores every CSV in csv_folder, or only csv_paths if given, one process per file
+    (workers=1 runs them in order). Returns the (model, run) pair of each file.
+    """
+    print(f"Processing CSV files from: {csv_folder}")
+    print(f"Ground truth file: {ground_truth_file}")
+    gt_index = load_ground_truth(ground_truth_file)
 
-        # Merge with ground truth data
-        merged_df = pred_df.merge(gt_df, on="filename", how="left")
+    if csv_paths is None:
+        csv_paths = list_csv_files(csv_folder)
+    if workers == 1 or len(csv_paths) < 2:
+        return [process_csv(path, gt_index, store_dir) for path in csv_paths]
 
-        # Compute accuracy percentage
-        def compute_accuracy(row):
-            if pd.notnull(row["Truth"]) and row["Truth"] != 0:
-                return round((row["number_of_people"] / row["Truth"]) * 100, 2)
-            return "N/A"
+    # Each file goes to its own partition, so workers never write the same files
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(process_csv, csv_paths, [gt_index] * len(csv_paths),
+                                 [store_dir] * len(csv_paths)))
 
-        merged_df["Accuracy (%)"] = merged_df.apply(compute_accuracy, axis=1)
 
-        # Define the output file path inside the "results" folder
-        results_filename = os.path.join(results_folder, f"results_{csv_file.replace('.csv', '.xlsx')}")
+def main():
+    parser = argparse.ArgumentParser(description="Compare every prediction CSV with the ground truth.")
+    parser.add_argument("--csv-folder", default=CSV_FOLDER)
+    parser.add_argument("--store", default=STORE_DIR, help="Parquet results store, partitioned by model and run")
+    parser.add_argument("--excel", action="store_true",
+                        help="Also export results_<run>_output.xlsx reports to --results-folder")
+    parser.add_argument("--results-folder", default=RESULTS_FOLDER)
+    parser.add_argument("--ground-truth", default=GROUND_TRUTH_FILE)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU; 1 disables parallelism)")
+    args = parser.parse_args()
+    process_folder(args.csv_folder, args.store, args.ground_truth, args.workers)
+    if args.excel:
+        os.makedirs(args.results_folder, exist_ok=True)
+        export_excel(args.store, args.results_folder)
 
-        # Save results to an Excel file
-        merged_df.to_excel(results_filename, index=False)
 
-        print(f"Results saved: {results_filename}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import os
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from results_store import STORE_DIR, load_results
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CI_FILE = os.path.join(ROOT_DIR, "Bootstrap_Model_CI.csv")
+PAIRED_FILE = os.path.join(ROOT_DIR, "Bootstrap_Paired_Differences.csv")
+
+RESAMPLES = 10000
+CONFIDENCE = 0.95
+SEED = 0
+# Resamples handled per block; bounds the (block, documents, runs) array held in memory
+BLOCK_SIZE = 1000
+
+
+def error_matrix(df):
+    """
+    Pivots the long results table into a documents x runs matrix of signed errors
+    (prediction - truth). A document a run has no usable prediction for is NaN.
+    When a file was predicted twice (appended reruns), the last prediction counts, as in
+    accuracy_script.py; this only matters for stores written before it deduplicated.
+    """
+    df = df.drop_duplicates(["run", "filename"], keep="last")
+    errors = (pd.to_numeric(df["number_of_people"], errors="coerce")
+              - pd.to_numeric(df["Truth"], errors="coerce"))
+    matrix = df.assign(error=errors).pivot(index="filename", columns="run", values="error")
+    return matrix.to_numpy(dtype=float), list(matrix.columns)
+
+
+def _block_statistics(errors, resamples, seed):
+    """
+    MAE, RMSE and bias of every run on `resamples` bootstrap samples drawn with one
+    index matrix, shared by all runs so that their statistics stay paired.
+    Returns three (resamples, runs) arrays.
+    """
+    n_documents = errors.shape[0]
+    indices = np.random.default_rng(seed).integers(0, n_documents, size=(resamples, n_documents))
+    sampled = errors[indices]  # (resamples, documents, runs)
+    present = ~np.isnan(sampled)
+    counts = present.sum(axis=1)
+    filled = np.where(present, sampled, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mae = np.abs(filled).sum(axis=1) / counts
+        rmse = np.sqrt((filled ** 2).sum(axis=1) / counts)
+        bias = filled.sum(axis=1) / counts
+    return mae, rmse, bias
+
+
+def _paired_differences(errors, pairs, indices):
+    """
+    MAE, RMSE and bias differences (first - second) of each pair, computed on the
+    documents both runs predicted, for each row of document indices.
+    Returns three (rows, pairs) arrays.
+    """
+    shape = (len(indices), len(pairs))
+    mae, rmse, bias = np.empty(shape), np.empty(shape), np.empty(shape)
+    for column, (first, second) in enumerate(pairs):
+        common = ~(np.isnan(errors[:, first]) | np.isnan(errors[:, second]))
+        a = np.where(common, errors[:, first], 0.0)[indices]
+        b = np.where(common, errors[:, second], 0.0)[indices]
+        counts = common[indices].sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mae[:, column] = (np.abs(a) - np.abs(b)).sum(axis=1) / counts
+            rmse[:, column] = np.sqrt((a ** 2).sum(axis=1) / counts) - np.sqrt((b ** 2).sum(axis=1) / counts)
+            bias[:, column] = (a - b).sum(axis=1) / counts
+    return mae, rmse, bias
+
+
+def _paired_block(errors, pairs, resamples, seed):
+    """Paired MAE, RMSE and bias differences on `resamples` bootstrap samples."""
+    n_documents = errors.shape[0]
+    indices = np.random.default_rng(seed).integers(0, n_documents, size=(resamples, n_documents))
+    return _paired_differences(errors, pairs, indices)
+
+
+def _blocks(resamples, seed):
+    """Splits the resamples into blocks with independent, reproducible seeds."""
+    sizes = [BLOCK_SIZE] * (resamples // BLOCK_SIZE) + ([resamples % BLOCK_SIZE] if resamples % BLOCK_SIZE else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return sizes, seeds
+
+
+def _run_blocks(function, arguments, sizes, seeds, workers):
+    calls = [(*arguments, size, block_seed) for size, block_seed in zip(sizes, seeds)]
+    if workers == 1:
+        return [function(*call) for call in calls]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, *zip(*calls)))
+
+
+def bootstrap(errors, runs, resamples=RESAMPLES, confidence=CONFIDENCE, seed=SEED, workers=1):
+    """
+    Bootstrap confidence intervals of MAE, RMSE and bias for every run, plus how
+    often each run comes out best on MAE, and of the paired differences between runs.
+    Returns (ci table, paired differences table).
+    P(best MAE) compares each run's MAE over the documents it predicted, so runs with
+    missing predictions are ranked on different documents; the paired differences use
+    only the documents both runs predicted. (Restricting P(best MAE) to documents every
+    run predicted would leave almost none when one run has few predictions.)
+    With workers > 1 the blocks of resamples are spread over a process pool.
+    """
+    sizes, seeds = _blocks(resamples, seed)
+    blocks = _run_blocks(_block_statistics, (errors,), sizes, seeds, workers)
+    mae, rmse, bias = (np.concatenate(parts) for parts in zip(*blocks))
+
+    low, high = 50 * (1 - confidence), 50 * (1 + confidence)
+    with np.errstate(invalid="ignore"):
+        best = np.nanargmin(np.where(np.isnan(mae), np.inf, mae), axis=1)
+    point_mae = np.nanmean(np.abs(errors), axis=0)
+    table = pd.DataFrame({
+        "run": runs,
+        "Documents": (~np.isnan(errors)).sum(axis=0),
+        "MAE": point_mae,
+        "MAE low": np.nanpercentile(mae, low, axis=0),
+        "MAE high": np.nanpercentile(mae, high, axis=0),
+        "RMSE": np.sqrt(np.nanmean(errors ** 2, axis=0)),
+        "RMSE low": np.nanpercentile(rmse, low, axis=0),
+        "RMSE high": np.nanpercentile(rmse, high, axis=0),
+        "Bias": np.nanmean(errors, axis=0),
+        "Bias low": np.nanpercentile(bias, low, axis=0),
+        "Bias high": np.nanpercentile(bias, high, axis=0),
+        "P(best MAE)": np.bincount(best, minlength=len(runs)) / resamples,
+    }).sort_values("MAE", kind="stable").reset_index(drop=True)
+
+    # Same seeds, so the paired differences use the very resamples behind the intervals
+    pairs = list(itertools.combinations(range(len(runs)), 2))
+    blocks = _run_blocks(_paired_block, (errors, pairs), sizes, seeds, workers)
+    resampled = [np.concatenate(parts) for parts in zip(*blocks)]
+    # Point differences on the documents of the actual sample, without resampling
+    points = [point[0] for point in _paired_differences(errors, pairs, np.arange(len(errors))[None, :])]
+    paired = pd.DataFrame({
+        "run": [runs[first] for first, _ in pairs],
+        "versus": [runs[second] for _, second in pairs],
+        "Documents": [int((~(np.isnan(errors[:, first]) | np.isnan(errors[:, second]))).sum())
+                      for first, second in pairs],
+    })
+    for name, point, differences in zip(["MAE", "RMSE", "Bias"], points, resampled):
+        paired[f"{name} difference"] = point
+        paired[f"{name} difference low"] = np.nanpercentile(differences, low, axis=0)
+        paired[f"{name} difference high"] = np.nanpercentile(differences, high, axis=0)
+    # A difference whose interval excludes zero is unlikely to flip with another sample of documents
+    paired["Significant"] = (paired["MAE difference low"] > 0) | (paired["MAE difference high"] < 0)
+    return table, paired
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals for every stored run.")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--resamples", type=int, default=RESAMPLES)
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for the resample blocks")
+    parser.add_argument("--output", default=CI_FILE)
+    parser.add_argument("--paired-output", default=PAIRED_FILE)
+    args = parser.parse_args()
+
+    errors, runs = error_matrix(load_results(args.store, columns=["filename", "number_of_people", "Truth", "run"]))
+    table, paired = bootstrap(errors, runs, args.resamples, args.confidence, args.seed, args.workers)
+
+    table.round(3).to_csv(args.output, index=False)
+    paired.round(3).to_csv(args.paired_output, index=False)
+    print(table.round(3).to_string(index=False))
+    print(f"Confidence intervals saved to {args.output}, paired differences to {args.paired_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,109 @@
 import os
+import argparse
+import numpy as np
 import pandas as pd
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-
-def calculate_metrics(y_true, y_pred):
-    """Calculate evaluation metrics for LLM predictions."""
-    mae = mean_absolute_error(y_true, y_pred)
-    mse = mean_squared_error(y_true, y_pred)
-    rmse = mean_squared_error(y_true, y_pred) ** 0.5
-    r2 = r2_score(y_true, y_pred)
-    bias = (y_pred - y_true).mean()
-    return mae, mse, rmse, r2, bias
-
-def process_results_folder(folder_path, output_file):
-    """Process all Excel files in the folder and compute metrics for each model."""
-    all_results = []
-    
-    # Loop through all Excel files in the folder
-    for file in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, file)
-        try:
-            if file.endswith(".xlsx"):
-                df = pd.read_excel(file_path, engine="openpyxl")
-            elif file.endswith(".xls"):
-                df = pd.read_excel(file_path, engine="xlrd")
-            else:
-                print(f"Skipping {file}, unsupported file format.")
-                continue
-        except Exception as e:
-            print(f"Error reading {file}: {e}")
-            continue
-            
-        if "Truth" not in df.columns or "number_of_people" not in df.columns:
-            print(f"Skipping {file}, missing required columns.")
-            continue
-        
-        filename_column = df["filename"] if "filename" in df.columns else None
-        truth = df["Truth"]
-        y_pred = df["number_of_people"]
-        
-        if y_pred.isnull().sum() > 0:
-            print(f"Warning: 'number_of_people' column in file {file} contains NaN values. Skipping...")
-            continue  # Skip if NaN values are present
-        print(file)
-        mae, mse, rmse, r2, bias = calculate_metrics(truth, y_pred)
-        
-        all_results.append({
-            "File": file,
-            "MAE": mae,
-            "MSE": mse,
-            "RMSE": rmse,
-            "R2 Score": r2,
-            "Bias": bias
-        })
-    
-    # Save results to an Excel file
-    if all_results:
-        results_df = pd.DataFrame(all_results)
-        results_df.to_excel(output_file, index=False, engine="openpyxl")
-        print(f"Metrics saved to {output_file}")
-    else:
+from results_store import STORE_DIR, load_results
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+OUTPUT_METRICS_FILE = os.path.join(ROOT_DIR, "LLM_NBC_Evaluation.xlsx")
+RANKED_FILE = os.path.join(ROOT_DIR, "MAE-Based_Ranked_Model_Performance.csv")
+
+METRIC_COLUMNS = ["MAE", "MSE", "RMSE", "R2 Score", "Bias", "Exact Match (%)"]
+
+
+def compute_metrics(df, by=("model", "run")):
+    """
+    Computes MAE, MSE, RMSE, R2, bias and exact-match rate for every group of a
+    long-format table (one row per prediction, with Truth and number_of_people)
+    in a single grouped pass. Rows without a prediction or a truth are left out
+    of the metrics and counted in "Missing".
+    """
+    by = list(by)
+    predicted = pd.to_numeric(df["number_of_people"], errors="coerce").to_numpy(dtype=float)
+    truth = pd.to_numeric(df["Truth"], errors="coerce").to_numpy(dtype=float)
+    error = predicted - truth
+    valid = ~np.isnan(error)
+
+    work = df[by].copy()
+    work["valid"] = valid
+    work["truth"] = np.where(valid, truth, np.nan)
+    work["error"] = np.where(valid, error, np.nan)
+    work["abs_error"] = np.abs(work["error"])
+    work["sq_error"] = work["error"] ** 2
+    work["exact"] = np.where(valid, error == 0, np.nan)
+    # Squared deviation of the truth from its group mean, for R2 = 1 - SSE / SST
+    work["sq_dev"] = (work["truth"] - work.groupby(by, sort=False)["truth"].transform("mean")) ** 2
+
+    grouped = work.groupby(by, sort=False)
+    metrics = grouped.agg(
+        Documents=("valid", "size"),
+        Scored=("valid", "sum"),
+        MAE=("abs_error", "mean"),
+        MSE=("sq_error", "mean"),
+        Bias=("error", "mean"),
+        exact=("exact", "mean"),
+        sse=("sq_error", "sum"),
+        sst=("sq_dev", "sum"),
+    ).reset_index()
+
+    metrics["Missing"] = metrics["Documents"] - metrics["Scored"]
+    metrics["RMSE"] = np.sqrt(metrics["MSE"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["R2 Score"] = np.where(metrics["sst"] > 0, 1 - metrics["sse"] / metrics["sst"], np.nan)
+    metrics["Exact Match (%)"] = metrics["exact"] * 100
+    return metrics[by + ["Documents", "Missing"] + METRIC_COLUMNS]
+
+
+def rank_models(metrics, by="MAE"):
+    """Sorts the metrics table by a metric (lower is better, except R2 and exact match) and adds Rank."""
+    ascending = by not in ("R2 Score", "Exact Match (%)")
+    ranked = metrics.sort_values(by, ascending=ascending, na_position="last", kind="stable").reset_index(drop=True)
+    ranked.insert(0, "Rank", ranked[by].rank(method="min", ascending=ascending).astype("Int64"))
+    return ranked
+
+
+def process_results_folder(store_dir=STORE_DIR, output_file=OUTPUT_METRICS_FILE, ranked_file=RANKED_FILE):
+    """Loads every run from the results store in one scan, computes its metrics and writes the reports."""
+    try:
+        df = load_results(store_dir, columns=["filename", "number_of_people", "Truth", "model", "run"])
+    except FileNotFoundError as e:
+        print(e)
+        return None
+
+    if df.empty:
         print("No valid files processed.")
+        return None
+
+    ranked = rank_models(compute_metrics(df))
+    write_reports(ranked, output_file, ranked_file)
+    return ranked
+
+
+def write_reports(ranked, output_file=OUTPUT_METRICS_FILE, ranked_file=RANKED_FILE):
+    """Writes the ranked metrics to the Excel evaluation file and the ranked CSV."""
+    for row in ranked.itertuples():
+        if row.Missing:
+            print(f"Warning: run {row.run} has {row.Missing} document(s) without a prediction or truth; "
+                  f"they are left out of its metrics.")
+
+    # Save results to an Excel file
+    ranked.rename(columns={"run": "File"}).to_excel(output_file, index=False, engine="openpyxl")
+    print(f"Metrics saved to {output_file}")
+
+    ranked.round(3).to_csv(ranked_file, index=False)
+    print(f"Ranked table saved to {ranked_file}")
+    print(ranked.round(3).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute and rank evaluation metrics for every stored run.")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--output", default=OUTPUT_METRICS_FILE, help="Excel file with the metrics of every run")
+    parser.add_argument("--ranked", default=RANKED_FILE, help="CSV file with the runs ranked by MAE")
+    args = parser.parse_args()
+    process_results_folder(args.store, args.output, args.ranked)
+
 
-# Usage
-results_folder = "results"  # Change this to your folder path
-output_metrics_file = "LLM_NBC_Evaluation.xlsx"
-process_results_folder(results_folder, output_metrics_file)
+if __name__ == "__main__":
+    main()
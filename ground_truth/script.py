@@ -1,17 +1,30 @@
 import os
+import sys
 import pandas as pd
 
-# Folder path
-folder_path = "../data"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ground_truth_index import GROUND_TRUTH_FILE, INDEX_FILE, GroundTruthIndex, report_coverage
+
+# Folder paths
+ground_truth_folder = os.path.dirname(os.path.abspath(__file__))
+folder_path = os.path.join(ground_truth_folder, "..", "data")
 
 # Get list of files
-files = os.listdir(folder_path)
+files = sorted(file for file in os.listdir(folder_path) if file.endswith(".txt"))
+
+# Load the annotated counts and check them against the corpus
+index = GroundTruthIndex.load(GROUND_TRUTH_FILE, index_file=None)
+coverage = index.coverage(files)
+report_coverage("data folder", {"without ground truth": coverage["unknown"],
+                                "listed twice": coverage["duplicate"],
+                                "annotated but missing": coverage["missing"]})
 
-# Create a DataFrame
-df = pd.DataFrame(files, columns=["Filename"])
+# Create a DataFrame with every file and its count (empty until annotated)
+df = pd.DataFrame({"filename": files, "Truth": index.align(files)})
+df["Truth"] = df["Truth"].astype("Int64")
 
-# Save to Excel and CSV
-df.to_excel("list_50.xlsx", index=False)
-df.to_csv("list_50.csv", index=False)
+# Save the list and the compact index used by the scoring scripts
+df.to_csv(os.path.join(ground_truth_folder, "list_50.csv"), index=False)
+index.save(INDEX_FILE, GROUND_TRUTH_FILE)
 
-print("Excel and CSV files have been created successfully!")
+print(f"{len(files)} files listed, {int(df['Truth'].notna().sum())} with a count; index saved to {INDEX_FILE}")
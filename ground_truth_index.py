@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+GROUND_TRUTH_FILE = os.path.join(ROOT_DIR, "ground_truth", "list_50.xlsx")
+# Compact copy of the ground truth, rebuilt whenever its source file changes
+INDEX_FILE = os.path.join(ROOT_DIR, "ground_truth", "index.npz")
+
+UNKNOWN_ID = -1
+
+
+def source_stamp(path):
+    """Identifies a ground-truth file by absolute path, modification time and size."""
+    stat = os.stat(path)
+    return {"source": os.path.abspath(path), "source_mtime": stat.st_mtime_ns, "source_size": stat.st_size}
+
+
+def document_ids(filenames):
+    """Numeric document IDs of filenames such as "12833.txt"; UNKNOWN_ID when a name is not numeric."""
+    stems = pd.Series(filenames, dtype="string").str.removesuffix(".txt")
+    return pd.to_numeric(stems, errors="coerce").fillna(UNKNOWN_ID).astype(np.int64).to_numpy()
+
+
+class GroundTruthIndex:
+    """
+    Ground-truth counts held as two sorted NumPy arrays, document IDs and counts.
+    Predictions are aligned by binary search on the IDs, so scoring a prediction set
+    needs no DataFrame merge.
+    """
+
+    def __init__(self, ids, truth):
+        order = np.argsort(ids, kind="stable")
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.truth = np.asarray(truth, dtype=float)[order]
+        if len(self.ids) and (np.diff(self.ids) == 0).any():
+            duplicates = np.unique(self.ids[1:][np.diff(self.ids) == 0])
+            raise ValueError(f"Ground truth lists {len(duplicates)} document(s) twice, e.g. {duplicates[:5].tolist()}")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_table(cls, df):
+        """Builds the index from a table with filename and Truth columns (the list_50 layout)."""
+        df = df.set_axis(["filename", "Truth"], axis=1)
+        ids = document_ids(df["filename"])
+        if (ids == UNKNOWN_ID).any():
+            invalid = df["filename"][ids == UNKNOWN_ID].tolist()
+            raise ValueError(f"Ground truth has non-numeric filenames: {invalid[:5]}")
+        return cls(ids, pd.to_numeric(df["Truth"], errors="coerce").to_numpy(dtype=float))
+
+    @classmethod
+    def load(cls, path=GROUND_TRUTH_FILE, index_file=INDEX_FILE):
+        """
+        Loads the index cache, rebuilding it from the spreadsheet/CSV unless the cache
+        was built from that same file, unchanged since.
+        """
+        stamp = source_stamp(path)
+        if index_file and os.path.exists(index_file):
+            with np.load(index_file) as cached:
+                if all(key in cached and cached[key].item() == value for key, value in stamp.items()):
+                    return cls(cached["ids"], cached["truth"])
+
+        df = pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path)
+        index = cls.from_table(df)
+        if index_file:
+            index.save(index_file, path)
+        return index
+
+    def save(self, index_file=INDEX_FILE, source=GROUND_TRUTH_FILE):
+        """Writes the index cache, recording the file it was built from."""
+        temporary = index_file + ".tmp.npz"
+        np.savez(temporary, ids=self.ids, truth=self.truth, **source_stamp(source))
+        os.replace(temporary, index_file)
+
+    def positions(self, filenames):
+        """Position of each filename in the index, -1 for documents without ground truth."""
+        ids = document_ids(filenames)
+        positions = np.searchsorted(self.ids, ids)
+        positions[positions == len(self.ids)] = 0
+        found = (len(self.ids) > 0) & (self.ids[positions] == ids) & (ids != UNKNOWN_ID)
+        return np.where(found, positions, -1)
+
+    def align(self, filenames):
+        """Ground-truth counts in the order of filenames; NaN where a document is unknown."""
+        positions = self.positions(filenames)
+        return np.where(positions >= 0, self.truth[np.maximum(positions, 0)], np.nan)
+
+    def coverage(self, filenames):
+        """
+        Checks a prediction set against the index. Returns a dict with the filenames
+        that are unknown to the ground truth, predicted more than once, and the
+        ground-truth documents that have no prediction.
+        """
+        filenames = pd.Series(filenames, dtype="string")
+        positions = self.positions(filenames)
+        seen = np.zeros(len(self.ids), dtype=bool)
+        seen[positions[positions >= 0]] = True
+        return {
+            "unknown": filenames[positions < 0].tolist(),
+            "duplicate": sorted(set(filenames[filenames.duplicated()].tolist())),
+            "missing": [f"{doc_id}.txt" for doc_id in self.ids[~seen]],
+        }
+
+    def to_frame(self):
+        return pd.DataFrame({"filename": [f"{doc_id}.txt" for doc_id in self.ids], "Truth": self.truth})
+
+
+def report_coverage(name, coverage):
+    """Prints one line per kind of coverage problem."""
+    for kind, filenames in coverage.items():
+        if filenames:
+            print(f"{name}: {len(filenames)} {kind} document(s), e.g. {', '.join(filenames[:5])}")
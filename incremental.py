@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import pandas as pd
+from accuracy_script import CSV_FOLDER, GROUND_TRUTH_FILE, list_csv_files, process_folder
+from results_store import STORE_DIR, load_results, delete_results
+from global_acc import OUTPUT_METRICS_FILE, RANKED_FILE, compute_metrics, rank_models, write_reports
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fingerprints of the inputs behind the store, and the per-run metrics computed from it
+MANIFEST_PATH = os.path.join(ROOT_DIR, "results", "manifest.json")
+METRICS_PATH = os.path.join(ROOT_DIR, "results", "metrics.parquet")
+
+
+def fingerprint(path, previous=None):
+    """
+    Content hash of a file. The size and mtime are checked first, so an untouched
+    file costs one stat call instead of a read.
+    """
+    stat = os.stat(path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous
+    with open(path, "rb") as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {"ground_truth": None, "files": {}}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def plan(csv_paths, ground_truth_file, manifest):
+    """
+    Compares the inputs with the manifest.
+    Returns (changed csv paths, removed file names, ground truth fingerprint, csv fingerprints).
+    A changed ground truth makes every file changed.
+    """
+    truth = fingerprint(ground_truth_file, manifest["ground_truth"])
+    truth_changed = manifest["ground_truth"] is None or truth["sha256"] != manifest["ground_truth"]["sha256"]
+
+    fingerprints = {}
+    changed = []
+    for path in csv_paths:
+        name = os.path.basename(path)
+        previous = manifest["files"].get(name)
+        fingerprints[name] = fingerprint(path, previous)
+        if truth_changed or previous is None or fingerprints[name]["sha256"] != previous["sha256"]:
+            changed.append(path)
+
+    removed = [name for name in manifest["files"] if name not in fingerprints]
+    return changed, removed, truth, fingerprints
+
+
+def update(csv_folder=CSV_FOLDER, store_dir=STORE_DIR, ground_truth_file=GROUND_TRUTH_FILE,
+           manifest_path=MANIFEST_PATH, metrics_path=METRICS_PATH, output_file=OUTPUT_METRICS_FILE,
+           ranked_file=RANKED_FILE, workers=None, force=False):
+    """
+    Rescores only the prediction files (or ground truth) that changed since the last
+    update, recomputes the metrics of the affected runs and patches them into the
+    stored metrics table. Returns the ranked table, or None when nothing changed.
+    With force every file is rescored; partitions of files that are gone are still deleted.
+    """
+    start = time.perf_counter()
+    previous = load_manifest(manifest_path)
+    manifest = previous
+    if force or not os.path.exists(metrics_path):
+        manifest = {"ground_truth": None if force else previous["ground_truth"], "files": {}}
+
+    changed, _, truth, fingerprints = plan(list_csv_files(csv_folder), ground_truth_file, manifest)
+    # Removed files are found against the stored manifest, so a rebuild also prunes them
+    removed = [name for name in previous["files"] if name not in fingerprints]
+    if not changed and not removed:
+        print(f"Results up to date ({(time.perf_counter() - start) * 1000:.1f}ms)")
+        return None
+
+    metrics = pd.read_parquet(metrics_path) if os.path.exists(metrics_path) else None
+    changed_names = {os.path.basename(path) for path in changed}
+    stale = [(entry["model"], entry["run"]) for name, entry in previous["files"].items()
+             if name in removed or name in changed_names]
+
+    scored = process_folder(csv_folder, store_dir, ground_truth_file, workers, csv_paths=changed) if changed else []
+    for path, (model, run) in zip(changed, scored):
+        fingerprints[os.path.basename(path)].update(model=model, run=run)
+
+    # A file whose model or run changed, or that is gone, leaves its old partition behind
+    for model, run in set(stale) - set(scored):
+        delete_results(model, run, store_dir)
+
+    if scored:
+        runs = sorted({run for _, run in scored})
+        fresh = compute_metrics(load_results(store_dir, runs=runs,
+                                             columns=["filename", "number_of_people", "Truth", "model", "run"]))
+    else:
+        fresh = None
+
+    if metrics is not None:
+        keep = ~metrics.set_index(["model", "run"]).index.isin(stale + scored)
+        metrics = metrics[keep]
+    metrics = pd.concat([frame for frame in (metrics, fresh) if frame is not None and not frame.empty],
+                        ignore_index=True)
+    metrics = metrics.drop(columns=["Rank"], errors="ignore")
+    metrics.to_parquet(metrics_path, index=False)
+
+    # A file that was only touched was re-hashed but keeps the run it was stored under
+    for name, entry in fingerprints.items():
+        entry.setdefault("model", previous["files"].get(name, {}).get("model"))
+        entry.setdefault("run", previous["files"].get(name, {}).get("run"))
+    save_manifest({"ground_truth": truth, "files": fingerprints}, manifest_path)
+
+    ranked = rank_models(metrics)
+    write_reports(ranked, output_file, ranked_file)
+    print(f"Rescored {len(changed)} file(s), removed {len(removed)}, "
+          f"in {time.perf_counter() - start:.2f}s")
+    return ranked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore only the prediction files that changed.")
+    parser.add_argument("--csv-folder", default=CSV_FOLDER)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--ground-truth", default=GROUND_TRUTH_FILE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and rescore everything")
+    args = parser.parse_args()
+    update(args.csv_folder, args.store, args.ground_truth, workers=args.workers, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
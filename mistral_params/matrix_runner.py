@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The runner and the extraction modules live in python_ollama_code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python_ollama_code"))
+from runner import run_entry
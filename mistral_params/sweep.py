@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import math
+import random
+import asyncio
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+
+PARAMS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(PARAMS_DIR, ".."))
+sys.path.insert(0, os.path.join(PARAMS_DIR, "..", "python_ollama_code"))
+from ground_truth_index import GroundTruthIndex
+from async_extraction import DATA_FOLDER, MAX_CONCURRENCY, REQUEST_TIMEOUT, load_documents, extract_people_count
+from chunking import MAX_NUM_CTX, plan_chunks
+from client_pool import make_client
+from prompt_registry import PROMPTS
+from runner import close_client
+
+MODEL = "mistral"
+# Sampling options tried by the sweep; the hand-written mistral_params runs used these values
+SEARCH_SPACE = {
+    "temperature": [0.2, 0.7, 1.0],
+    "top_k": [20, 50, 80],
+    "top_p": [0.5, 0.85, 0.95],
+    "repeat_penalty": [1.0, 1.1, 1.2],
+}
+# Documents scored by every configuration before the first pruning
+MIN_DOCUMENTS = 8
+# Each rung keeps 1/ETA of the configurations and gives them ETA times the documents
+ETA = 2
+# Keep the model loaded between rungs
+KEEP_ALIVE = "30m"
+
+SWEEP_FILE = os.path.join(PARAMS_DIR, "sweep_results.csv")
+
+
+def grid(space):
+    """Every combination of the search space, as option dicts."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_configs(space, samples, seed=None):
+    """samples distinct combinations of the search space, drawn at random."""
+    configs = grid(space)
+    return random.Random(seed).sample(configs, min(samples, len(configs)))
+
+
+class Trial:
+    """One configuration of the sweep and the predictions it has made so far."""
+
+    def __init__(self, number, options):
+        self.number = number
+        self.options = options
+        self.rows = {}
+        self.rung = 0
+        self.status = "running"
+
+    def score(self, index):
+        """MAE over the documents done, how many have no count, mean latency and generation tokens/sec."""
+        rows = list(self.rows.values())
+        predicted = pd.to_numeric(pd.Series([row["number_of_people"] for row in rows], dtype=object),
+                                  errors="coerce").to_numpy(dtype=float)
+        errors = np.abs(predicted - index.align([row["filename"] for row in rows]))
+        eval_count = sum(row["eval_count"] or 0 for row in rows)
+        eval_duration = sum(row["eval_duration"] or 0 for row in rows)
+        return {
+            "MAE": float(np.nanmean(errors)) if np.isfinite(errors).any() else float("nan"),
+            "Missing": int(np.isnan(predicted).sum()),
+            "Latency (s)": float(np.mean([row["latency"] for row in rows])) if rows else float("nan"),
+            "Tokens/sec": eval_count / eval_duration * 1e9 if eval_duration else float("nan"),
+        }
+
+    def summary(self, index):
+        return {"config": self.number, **self.options, "Documents": len(self.rows), "Rung": self.rung,
+                "Status": self.status, **self.score(index)}
+
+
+async def evaluate(trial, documents, client, semaphore, prompt, options, timeout):
+    """
+    Runs a trial on the documents it has not seen yet; every trial shares the semaphore.
+    The response cache is bypassed, so every answer is measured and timed afresh.
+    """
+    pending = [(filename, text, chunks) for filename, text, chunks in documents if filename not in trial.rows]
+
+    async def run_one(filename, text, chunks):
+        trial.rows[filename] = await extract_people_count(
+            client, semaphore, text, filename, MODEL, prompt, {**options, **trial.options}, timeout,
+            KEEP_ALIVE, None, chunks)
+
+    await asyncio.gather(*(run_one(*document) for document in pending))
+
+
+def ranking(trials, index):
+    """Trials from best to worst: lowest MAE, then fewest missing counts, then lowest latency."""
+    scores = {trial.number: trial.score(index) for trial in trials}
+    return sorted(trials, key=lambda trial: (np.nan_to_num(scores[trial.number]["MAE"], nan=np.inf),
+                                             scores[trial.number]["Missing"], scores[trial.number]["Latency (s)"]))
+
+
+def write_table(trials, index, output):
+    """Writes one row per configuration, those that got furthest first, each group best first."""
+    ordered = sorted(ranking(trials, index), key=lambda trial: -len(trial.rows))
+    table = pd.DataFrame([trial.summary(index) for trial in ordered])
+    table.round(4).to_csv(output, index=False)
+    return table
+
+
+async def sweep(configs, documents, index, hosts=None, prompt_name="en", concurrency=MAX_CONCURRENCY,
+                min_documents=MIN_DOCUMENTS, eta=ETA, max_num_ctx=MAX_NUM_CTX, timeout=REQUEST_TIMEOUT,
+                seed=None, output=SWEEP_FILE):
+    """
+    Successive halving over the configurations. Every surviving configuration is run
+    concurrently on a growing prefix of one shuffled document order, scored against
+    the ground truth, and only the best 1/eta go on to eta times the documents, until
+    the survivors have seen the whole corpus. Documents done in earlier rungs are not
+    sent again. The table is rewritten after every rung; returns it.
+    """
+    prompt = PROMPTS[prompt_name]
+    # One num_ctx for every configuration, so the model is never reloaded
+    num_ctx, planned = plan_chunks(documents, MODEL, prompt, max_num_ctx)
+    order = [(filename, text, chunks) for (filename, text), (_, chunks) in zip(documents, planned)]
+    random.Random(seed).shuffle(order)
+
+    trials = [Trial(number, options) for number, options in enumerate(configs, 1)]
+    survivors = list(trials)
+    client = make_client(hosts)
+    semaphore = asyncio.Semaphore(concurrency)
+    size = min(min_documents, len(order))
+    rung = 0
+    try:
+        while True:
+            for trial in survivors:
+                trial.rung = rung
+            await asyncio.gather(*(evaluate(trial, order[:size], client, semaphore, prompt, {"num_ctx": num_ctx},
+                                            timeout)
+                                   for trial in survivors))
+            ranked = ranking(survivors, index)
+            best = ranked[0].score(index)
+            print(f"Rung {rung}: {len(survivors)} configuration(s) on {size} document(s), "
+                  f"best MAE {best['MAE']:.3f} (config {ranked[0].number}: {ranked[0].options})")
+
+            if size >= len(order):
+                break
+            keep = max(1, math.ceil(len(survivors) / eta))
+            for trial in ranked[keep:]:
+                trial.status = f"pruned after {size} docs"
+            survivors = ranked[:keep]
+            write_table(trials, index, output)
+            size = len(order) if len(survivors) == 1 else min(size * eta, len(order))
+            rung += 1
+    finally:
+        await close_client(client)
+
+    for trial in survivors:
+        trial.status = "finished"
+    return write_table(trials, index, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sampling-option sweep for mistral with successive halving.")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=16, help="Configurations drawn by random search")
+    parser.add_argument("--space", default=None,
+                        help="JSON file mapping Ollama options to lists of values (default: SEARCH_SPACE)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for random search and the document order")
+    parser.add_argument("--min-documents", type=int, default=MIN_DOCUMENTS)
+    parser.add_argument("--eta", type=int, default=ETA)
+    parser.add_argument("--prompt", default="en", choices=PROMPTS.names())
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help="Requests in flight across all configurations")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument("--hosts", default=None)
+    parser.add_argument("--max-num-ctx", type=int, default=MAX_NUM_CTX)
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--output", default=SWEEP_FILE)
+    args = parser.parse_args()
+
+    space = SEARCH_SPACE
+    if args.space:
+        with open(args.space, "r", encoding="utf-8") as file:
+            space = json.load(file)
+    configs = grid(space) if args.search == "grid" else random_configs(space, args.samples, args.seed)
+    print(f"Sweeping {len(configs)} configuration(s) ({args.search} search)")
+
+    table = asyncio.run(sweep(configs, load_documents(args.data_folder), GroundTruthIndex.load(), args.hosts,
+                              args.prompt, args.concurrency, args.min_documents, args.eta, args.max_num_ctx,
+                              args.timeout, args.seed, args.output))
+    print(table.round(3).head(10).to_string(index=False))
+    print(f"Sweep table saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from results_store import STORE_DIR, load_results
+from global_acc import compute_metrics
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, "python_ollama_code"))
+from runner import MODEL_MATRIX, resolve_output
+from result_sink import TIMING_FIELDS
+
+LEDGER_FILE = os.path.join(ROOT_DIR, "Speed_vs_MAE_Performance.csv")
+
+NANOSECONDS = 1e9
+
+READERS = {
+    ".csv": pd.read_csv,
+    ".jsonl": lambda path: pd.read_json(path, lines=True),
+    ".parquet": pd.read_parquet,
+}
+
+
+def load_predictions(specs=MODEL_MATRIX):
+    """
+    Raw prediction rows of every matrix entry, from whichever of its CSV, JSONL or
+    Parquet outputs was written last, with run and model columns.
+    """
+    frames = []
+    for spec in specs:
+        paths = [resolve_output(spec, fmt) for fmt in ("csv", "jsonl", "parquet")]
+        paths = [path for path in paths if os.path.exists(path)]
+        if not paths:
+            continue
+        path = max(paths, key=os.path.getmtime)
+        df = READERS[os.path.splitext(path)[1]](path)
+        if "model" not in df.columns:
+            df["model"] = spec["model"]
+        frames.append(df.assign(run=spec["name"], model=df["model"].fillna(spec["model"])))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def build_ledger(predictions):
+    """
+    Aggregates per-call timings into one row per (model, run): prompt and generation
+    tokens/sec, load time and its share of server time, server and wall time per
+    document, and wall-time percentiles. Documents answered by the rule prefilter
+    are left out, and runs written before timings were recorded get NaN.
+    """
+    df = predictions
+    if "source" in df.columns:
+        df = df[df["source"].fillna("llm") == "llm"]
+    df = df.assign(**{column: pd.to_numeric(df[column], errors="coerce") if column in df.columns else np.nan
+                      for column in TIMING_FIELDS + ["latency"]})
+
+    grouped = df.groupby(["model", "run"], sort=False)
+    sums = grouped[TIMING_FIELDS].sum(min_count=1)
+    latency = grouped["latency"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ledger = pd.DataFrame({
+            "Documents": grouped.size(),
+            "Timed": grouped["total_duration"].count(),
+            "Prompt tok/s": sums["prompt_eval_count"] / sums["prompt_eval_duration"] * NANOSECONDS,
+            "Generation tok/s": sums["eval_count"] / sums["eval_duration"] * NANOSECONDS,
+            "Load (s)": sums["load_duration"] / NANOSECONDS,
+            "Load share (%)": sums["load_duration"] / sums["total_duration"] * 100,
+            "Server s/doc": grouped["total_duration"].mean() / NANOSECONDS,
+            "Wall s/doc": latency.mean(),
+            "Wall p50 (s)": latency.quantile(0.5),
+            "Wall p95 (s)": latency.quantile(0.95),
+        })
+    return ledger.reset_index()
+
+
+def speed_vs_accuracy(ledger, metrics):
+    """Joins the ledger with the accuracy metrics, best MAE first."""
+    table = metrics[["model", "run", "MAE", "RMSE", "Bias", "Exact Match (%)"]].merge(
+        ledger, on=["model", "run"], how="outer")
+    return table.sort_values(["MAE", "Wall s/doc"], na_position="last", kind="stable").reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-model speed ledger joined with the accuracy metrics.")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--output", default=LEDGER_FILE)
+    args = parser.parse_args()
+
+    ledger = build_ledger(load_predictions())
+    metrics = compute_metrics(load_results(args.store, columns=["filename", "number_of_people", "Truth",
+                                                                "model", "run"]))
+    table = speed_vs_accuracy(ledger, metrics)
+    table.round(3).to_csv(args.output, index=False)
+    print(table.round(3).to_string(index=False))
+    print(f"Ledger saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
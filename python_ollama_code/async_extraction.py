@@ -0,0 +1,576 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from ollama import AsyncClient
+from client_pool import ClientPool, make_client
+from prompt_registry import PROMPTS, PROMPT_LAYOUTS
+from response_cache import ResponseCache, cache_key, cacheable
+from chunking import MAX_NUM_CTX, DEFAULT_CONTEXT_WINDOW, plan_chunks, pack_documents, merge_counts
+from rule_based import extract_rule_based
+from streaming import AnswerDetector
+from structured_output import ANSWER_SCHEMA, PACKED_SCHEMA, PARSE_STATS, parse_answer, parse_answers, match_answers
+from resilience import (DEFAULT_POLICY, REQUEST_ERRORS, RetryPolicy, DeadLetter, call_with_retries,
+                        describe_error)
+from result_sink import BATCH_SIZE, TIMING_FIELDS, ResultSink, options_hash, install_signal_handlers
+
+DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+
+# Maximum number of requests in flight against the Ollama server at once
+MAX_CONCURRENCY = 4
+# Seconds allowed for a single chat request before it is abandoned
+REQUEST_TIMEOUT = 300
+# Generation cap (num_predict) applied with --num-predict; None keeps the model's default
+NUM_PREDICT = None
+
+PROMPT_TEMPLATE = PROMPTS["en"]
+
+
+def load_documents(data_folder=DATA_FOLDER):
+    """Reads every .txt file in the data folder, sorted by filename."""
+    if not os.path.exists(data_folder):
+        print(f"Folder {data_folder} does not exist.")
+        return []
+
+    documents = []
+    for filename in sorted(os.listdir(data_folder)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(data_folder, filename), "r", encoding="utf-8") as file:
+                documents.append((filename, file.read()))
+    return documents
+
+
+def ollama_timings(response):
+    """Ollama's timing counters from a final response message (None for any it did not send)."""
+    return {field: response.get(field) for field in TIMING_FIELDS}
+
+
+def add_timings(first, second):
+    """Adds two sets of timing counters field by field; a field stays None only if both are."""
+    totals = {}
+    for field in TIMING_FIELDS:
+        values = [timings.get(field) for timings in (first, second) if timings and timings.get(field) is not None]
+        totals[field] = sum(values) if values else None
+    return totals
+
+
+async def request_completion(client, semaphore, model, messages, options=None,
+                             timeout=REQUEST_TIMEOUT, keep_alive=None, output_format=None):
+    """
+    Sends one chat request while holding a semaphore slot; returns (content, latency, timings).
+    output_format is Ollama's format parameter ("json" or a JSON schema).
+    """
+    async with semaphore:
+        start = time.perf_counter()
+        result = await asyncio.wait_for(
+            client.chat(model=model, messages=messages,
+                        options=options, keep_alive=keep_alive, format=output_format),
+            timeout=timeout,
+        )
+        latency = time.perf_counter() - start
+
+    if not result or "message" not in result or not result["message"].get("content"):
+        raise ValueError("No valid response from LLM.")
+    return result["message"]["content"].strip(), latency, ollama_timings(result)
+
+
+async def stream_completion(client, semaphore, model, messages, options=None,
+                            timeout=REQUEST_TIMEOUT, keep_alive=None, output_format=None):
+    """
+    Streams one chat request and stops reading as soon as a complete JSON object with
+    number_of_people has arrived; closing the stream makes Ollama stop generating.
+    Returns (content, latency, time to first token, time to answer, timings). Ollama only
+    sends its timing counters with the last message, so they are None when the stream
+    was cut short.
+    """
+    pieces = []
+    ttft = None
+    time_to_answer = None
+    timings = None
+
+    async def consume(start):
+        nonlocal ttft, time_to_answer, timings
+        stream = await client.chat(model=model, messages=messages,
+                                   options=options, keep_alive=keep_alive, format=output_format,
+                                   stream=True)
+        detector = AnswerDetector()
+        try:
+            async for part in stream:
+                if part.get("done"):
+                    timings = ollama_timings(part)
+                piece = part["message"].get("content") or ""
+                if not piece:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                pieces.append(piece)
+                if detector.feed(piece) is not None:
+                    time_to_answer = time.perf_counter() - start
+                    break
+        finally:
+            await stream.aclose()
+
+    async with semaphore:
+        start = time.perf_counter()
+        await asyncio.wait_for(consume(start), timeout=timeout)
+        latency = time.perf_counter() - start
+
+    content = "".join(pieces).strip()
+    if not content:
+        raise ValueError("No valid response from LLM.")
+    return content, latency, ttft, time_to_answer, timings
+
+
+async def extract_chunk(client, semaphore, text, filename, model, prompt_template=PROMPT_TEMPLATE,
+                        options=None, timeout=REQUEST_TIMEOUT, keep_alive=None, cache=None, stream=False,
+                        structured=False, retry_policy=DEFAULT_POLICY):
+    """
+    Sends one piece of text to the model, consulting the response cache first when the
+    options make the response reproducible (response_cache.cacheable).
+    With structured, the response is constrained to structured_output.ANSWER_SCHEMA.
+    Connection and overload errors are retried with backoff according to retry_policy;
+    an unparseable response is requested again up to retry_policy.parse_retries times,
+    constrained to the answer schema.
+    Returns a dict with number_of_people, raw_response, latency, ttft, time_to_answer,
+    Ollama's timing counters (summed over attempts) and error.
+    """
+    messages = prompt_template.messages(text=text, filename=filename)
+    prompt = "\n\n".join(message["content"] for message in messages)
+    output_format = ANSWER_SCHEMA if structured else None
+    # A sampled response is one draw among many; replaying it would make reruns identical
+    if cache is not None and not cacheable(options):
+        cache.bypass()
+        cache = None
+    part = {"number_of_people": None, "raw_response": None, "latency": 0.0,
+            "ttft": None, "time_to_answer": None, "timings": None, "error": None}
+
+    async def complete():
+        if stream:
+            return await stream_completion(client, semaphore, model, messages, options, timeout, keep_alive,
+                                           output_format)
+        output_text, latency, timings = await request_completion(client, semaphore, model, messages, options,
+                                                                 timeout, keep_alive, output_format)
+        return output_text, latency, None, latency, timings
+
+    for _ in range(retry_policy.parse_retries + 1):
+        key = cache_key(model, prompt, options, output_format) if cache is not None else None
+        output_text = cache.get(key) if cache is not None else None
+        from_cache = output_text is not None
+
+        try:
+            if not from_cache:
+                output_text, latency, part["ttft"], part["time_to_answer"], timings = await call_with_retries(
+                    complete, retry_policy, f"[{model}] {filename}")
+                part["latency"] += latency
+                part["timings"] = add_timings(part["timings"], timings)
+            part["raw_response"] = output_text
+            output_json, outcome = parse_answer(output_text)
+        except REQUEST_ERRORS as e:
+            part["error"] = describe_error(e)
+            if isinstance(e, asyncio.TimeoutError):
+                part["error"] += f" after {timeout}s"
+            return part
+        except ValueError as e:
+            PARSE_STATS.record(model, "failed")
+            part["error"] = str(e)
+            output_format = ANSWER_SCHEMA
+            continue
+
+        PARSE_STATS.record(model, outcome)
+        # Only responses that parsed are worth replaying
+        if cache is not None and not from_cache:
+            cache.put(key, model, output_text)
+        part["number_of_people"] = output_json["number_of_people"]
+        part["error"] = None
+        return part
+    return part
+
+
+async def extract_people_count(client, semaphore, text, filename, model,
+                               prompt_template=PROMPT_TEMPLATE, options=None,
+                               timeout=REQUEST_TIMEOUT, keep_alive=None, cache=None, chunks=None,
+                               stream=False, structured=False, retry_policy=DEFAULT_POLICY):
+    """
+    Extracts the number of people in a ski outing.
+    When the text was split into chunks, they are sent concurrently and their
+    counts merged with chunking.merge_counts; if some chunks failed, the merged
+    count of the others is kept with an error starting with "partial".
+    """
+    segments = chunks or [text]
+    parts = await asyncio.gather(*(
+        extract_chunk(client, semaphore, segment, filename, model, prompt_template, options,
+                      timeout, keep_alive, cache, stream, structured, retry_policy)
+        for segment in segments
+    ))
+
+    if len(parts) == 1:
+        part = parts[0]
+        number_of_people, output_text, error = part["number_of_people"], part["raw_response"], part["error"]
+        latency, ttft, time_to_answer = part["latency"], part["ttft"], part["time_to_answer"]
+        timings = part["timings"]
+    else:
+        number_of_people = merge_counts([part["number_of_people"] for part in parts if part["error"] is None])
+        output_text = json.dumps([part["raw_response"] for part in parts], ensure_ascii=False)
+        latency = sum(part["latency"] for part in parts)
+        # The first token of any chunk, and the answer once every chunk has answered
+        ttft = min((part["ttft"] for part in parts if part["ttft"] is not None), default=None)
+        answers = [part["time_to_answer"] for part in parts]
+        time_to_answer = max(answers) if None not in answers else None
+        timings = None
+        for part in parts:
+            timings = add_timings(timings, part["timings"])
+        failed = [part["error"] for part in parts if part["error"]]
+        error = "; ".join(failed) or None
+        # A count merged from only some chunks is kept, but the row is not complete
+        if failed and number_of_people is not None:
+            error = f"partial: {len(failed)} of {len(parts)} chunks failed: {error}"
+
+    # A failed document keeps an empty count and its error rather than a made-up 0
+    if error:
+        print(f"Error processing file {filename}: {error}")
+    return {
+        "filename": filename,
+        "number_of_people": number_of_people,
+        "model": model,
+        "options_hash": options_hash(options),
+        "prompt_version": getattr(prompt_template, "version", None),
+        "latency": latency,
+        "ttft": ttft,
+        "time_to_answer": time_to_answer,
+        "chunks": len(segments),
+        "pack": 1,
+        "source": "llm",
+        "raw_response": output_text,
+        "error": error,
+        **(timings or dict.fromkeys(TIMING_FIELDS)),
+    }
+
+
+async def extract_pack(client, semaphore, pack, model, prompt_template, options=None,
+                       timeout=REQUEST_TIMEOUT, keep_alive=None, cache=None, structured=False,
+                       retry_policy=DEFAULT_POLICY):
+    """
+    Sends a pack of (filename, text) documents in one request, prompt_template being a
+    packed prompt, and expects a JSON array with one answer per document.
+    Returns {filename: row} for the documents whose answer came back; the caller sends
+    the others on their own. Each row gets an equal share of the request's latency and
+    timing counters; time_to_answer stays the wait for the whole response.
+    """
+    filenames = [filename for filename, _ in pack]
+    label = f"[{model}] pack of {len(pack)} ({filenames[0]}, ...)"
+    messages = prompt_template.messages(documents=pack)
+    prompt = "\n\n".join(message["content"] for message in messages)
+    output_format = PACKED_SCHEMA if structured else None
+    if cache is not None and not cacheable(options):
+        cache.bypass()
+        cache = None
+    key = cache_key(model, prompt, options, output_format) if cache is not None else None
+    output_text = cache.get(key) if cache is not None else None
+    from_cache = output_text is not None
+    latency, timings = 0.0, None
+
+    try:
+        if not from_cache:
+            output_text, latency, timings = await call_with_retries(
+                lambda: request_completion(client, semaphore, model, messages, options, timeout, keep_alive,
+                                           output_format),
+                retry_policy, label)
+        answers, outcome = parse_answers(output_text)
+    except REQUEST_ERRORS as e:
+        print(f"{label}: {describe_error(e)}, sending its documents one by one")
+        return {}
+    except ValueError:
+        PARSE_STATS.record(model, "failed")
+        print(f"{label}: no answers in the response, sending its documents one by one")
+        return {}
+
+    PARSE_STATS.record(model, outcome)
+    matched = match_answers(answers, filenames)
+    if len(matched) < len(pack):
+        print(f"{label}: {len(pack) - len(matched)} answer(s) missing, sending them one by one")
+    elif cache is not None and not from_cache:
+        cache.put(key, model, output_text)
+
+    share = {field: value // len(pack) if value is not None else None
+             for field, value in (timings or dict.fromkeys(TIMING_FIELDS)).items()}
+    return {
+        filename: {
+            "filename": filename,
+            "number_of_people": answer["number_of_people"],
+            "model": model,
+            "options_hash": options_hash(options),
+            "prompt_version": getattr(prompt_template, "version", None),
+            "latency": latency / len(pack),
+            "ttft": None,
+            "time_to_answer": latency,
+            "chunks": 1,
+            "pack": len(pack),
+            "source": "llm",
+            "raw_response": json.dumps(answer, ensure_ascii=False),
+            "error": None,
+            **share,
+        }
+        for filename, answer in matched.items()
+    }
+
+
+async def process_txt_files(model, output_path, prompt_template=PROMPT_TEMPLATE, options=None,
+                            documents=None, client=None, concurrency=MAX_CONCURRENCY,
+                            timeout=REQUEST_TIMEOUT, keep_alive=None, cache=None, on_result=None,
+                            batch_size=BATCH_SIZE, chunking=True, max_num_ctx=MAX_NUM_CTX,
+                            num_ctx=None, prefilter=False, validate_prefilter=False, stream=False,
+                            num_predict=NUM_PREDICT, structured=False, retry_policy=DEFAULT_POLICY,
+                            dead_letter=None, prompt_layout="inline", pack_size=None, temperature=None,
+                            seed=None, semaphore=None):
+    """
+    Runs extraction over the whole corpus concurrently and returns results in document order.
+    With chunking, one num_ctx is used for the run (chosen from the corpus unless given)
+    and longer texts are split to fit it.
+    Rows are handed to a ResultSink for output_path (CSV, JSONL or Parquet) as soon as
+    their document finishes; output_path=None leaves writing the output to the caller.
+    on_result, if given, is also called with each finished row.
+    With prefilter, reports whose group size rule_based can read with confidence are
+    answered locally; validate_prefilter still asks the model for them and compares.
+    With stream, each response is read token by token and cut off once its JSON answer
+    is complete; num_predict caps the tokens generated either way. With structured, the
+    server constrains every response to the answer schema.
+    Requests are retried according to retry_policy (resilience.RetryPolicy); rows that
+    still fail are appended to dead_letter (resilience.DeadLetter) if given.
+    prompt_layout "prefix" sends the prompt's instructions as a fixed system message, so
+    the server can reuse the evaluated prefix from one document to the next.
+    With pack_size, documents that need neither chunking nor the prefilter are sent up to
+    pack_size at a time, as many as fit num_ctx, in one (never streamed) request each; a
+    document whose answer does not come back is sent again on its own.
+    temperature and seed, when given, override the sampling options; a temperature of 0
+    or a seed makes responses reproducible, so the response cache is used for them.
+    A semaphore shared with other runs going on at the same time bounds their requests
+    together; otherwise the run gets its own, of size concurrency.
+    """
+    if prompt_layout != "inline":
+        prompt_template = PROMPTS.with_layout(prompt_template, prompt_layout)
+    if documents is None:
+        documents = load_documents()
+    if client is None:
+        client = AsyncClient()
+
+    if chunking:
+        num_ctx, planned = plan_chunks(documents, model, prompt_template, max_num_ctx, num_ctx)
+        options = {**(options or {}), "num_ctx": num_ctx}
+        split = sum(1 for _, chunks in planned if len(chunks) > 1)
+        print(f"[{model}] num_ctx={num_ctx}, {split} of {len(planned)} document(s) split into chunks")
+    else:
+        planned = [(filename, None) for filename, _ in documents]
+
+    packs = []
+    if pack_size and pack_size > 1:
+        packed_prompt = PROMPTS.packed(prompt_template)
+        candidates = [(filename, text) for (filename, text), (_, chunks) in zip(documents, planned)
+                      if (chunks is None or len(chunks) == 1) and not (prefilter and extract_rule_based(text))]
+        packs = [pack for pack in pack_documents(candidates, packed_prompt, num_ctx or DEFAULT_CONTEXT_WINDOW,
+                                                 pack_size)
+                 if len(pack) > 1]
+
+    if num_predict is not None:
+        options = {**(options or {}), "num_predict": num_predict}
+    if temperature is not None:
+        options = {**(options or {}), "temperature": temperature}
+    if seed is not None:
+        options = {**(options or {}), "seed": seed}
+
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(concurrency)
+    parse_counts = PARSE_STATS.counts(model)
+    sink = ResultSink(output_path, batch_size=batch_size) if output_path is not None else None
+    start = time.perf_counter()
+
+    # Every document of a pack waits on the same request
+    pack_requests = {}
+    for pack in packs:
+        request = asyncio.ensure_future(extract_pack(client, semaphore, pack, model, packed_prompt, options,
+                                                     timeout, keep_alive, cache, structured, retry_policy))
+        pack_requests.update((filename, request) for filename, _ in pack)
+
+    async def run_one(filename, text, chunks):
+        rule = extract_rule_based(text) if prefilter else None
+        if rule is not None and not validate_prefilter:
+            row = rule_based_row(filename, model, rule)
+        else:
+            row = (await pack_requests[filename]).get(filename) if filename in pack_requests else None
+            if row is None:
+                row = await extract_people_count(client, semaphore, text, filename, model, prompt_template,
+                                                 options, timeout, keep_alive, cache, chunks, stream,
+                                                 structured, retry_policy)
+            if rule is not None:
+                row["rule_number"] = rule["number_of_people"]
+        if row["error"] and dead_letter is not None:
+            dead_letter.record(row)
+        if sink is not None:
+            sink.add(row)
+        if on_result is not None:
+            on_result(row)
+        return row
+
+    try:
+        # gather keeps results in the order of the documents list
+        results = await asyncio.gather(*(
+            run_one(filename, text, chunks) for (filename, text), (_, chunks) in zip(documents, planned)
+        ))
+    finally:
+        if sink is not None:
+            sink.close()
+
+    wall_time = time.perf_counter() - start
+    report_throughput(model, results, wall_time, concurrency)
+    PARSE_STATS.report(model, since=parse_counts)
+    if prefilter:
+        report_prefilter(model, results)
+    if packs:
+        report_packing(model, packs, results)
+    return results
+
+
+def rule_based_row(filename, model, rule):
+    """Result row for a document answered by the rule-based extractor."""
+    return {
+        "filename": filename,
+        "number_of_people": rule["number_of_people"],
+        "model": model,
+        "latency": 0.0,
+        "chunks": 0,
+        "source": "rule",
+        "raw_response": rule["match"],
+        "error": None,
+    }
+
+
+def report_prefilter(model, results):
+    """Prints how many documents the rules resolved and, when validating, how often the LLM agreed."""
+    if not results:
+        return
+
+    short_circuited = sum(1 for row in results if row.get("source") == "rule")
+    print(f"[{model}] Rule-based prefilter resolved {short_circuited} of {len(results)} document(s) "
+          f"({short_circuited / len(results):.1%})")
+
+    validated = [row for row in results if "rule_number" in row and not row["error"]]
+    if validated:
+        agree = sum(1 for row in validated if str(row["number_of_people"]) == str(row["rule_number"]))
+        print(f"[{model}] Validation: rules matched {len(validated)} document(s), "
+              f"LLM agreed on {agree} ({agree / len(validated):.1%})")
+
+
+def report_packing(model, packs, results):
+    """Prints how many documents went out in packs and how many had to be sent again alone."""
+    packed = {filename for pack in packs for filename, _ in pack}
+    fallbacks = sum(1 for row in results if row["filename"] in packed and row.get("pack") == 1)
+    print(f"[{model}] Packing: {len(packed)} document(s) in {len(packs)} request(s) "
+          f"({len(packed) / len(packs):.1f} per pack), {fallbacks} sent again on their own")
+
+
+def report_throughput(model, results, wall_time, concurrency):
+    """Prints per-document latency and aggregate docs/sec for a run."""
+    if not results:
+        print(f"[{model}] No documents processed.")
+        return
+
+    for row in results:
+        print(f"[{model}] {row['filename']}: {row['number_of_people']} ({row['latency']:.2f}s)")
+
+    latencies = sorted(row["latency"] for row in results)
+    print(
+        f"[{model}] {len(results)} documents in {wall_time:.2f}s "
+        f"({len(results) / wall_time:.2f} docs/sec, concurrency={concurrency}), "
+        f"latency mean={statistics.mean(latencies):.2f}s "
+        f"median={statistics.median(latencies):.2f}s max={latencies[-1]:.2f}s"
+    )
+
+    ttfts = [row["ttft"] for row in results if row.get("ttft") is not None]
+    answers = [row["time_to_answer"] for row in results if row.get("time_to_answer") is not None]
+    if ttfts:
+        print(f"[{model}] time to first token mean={statistics.mean(ttfts):.2f}s max={max(ttfts):.2f}s")
+    if ttfts and answers:
+        print(f"[{model}] time to answer mean={statistics.mean(answers):.2f}s max={max(answers):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent people-count extraction over the data folder.")
+    parser.add_argument("--model", required=True, help="Ollama model tag, e.g. llama3.1:8b")
+    parser.add_argument("--output", required=True,
+                        help="File to append predictions to (.csv, .jsonl or .parquet)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="Rows buffered before they are written out")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help="Maximum number of requests in flight")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT,
+                        help="Per-request timeout in seconds")
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--hosts", default=None,
+                        help="Comma-separated Ollama endpoints to balance requests over "
+                             "(default: $OLLAMA_HOSTS or the local server); raise --concurrency to match")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the response cache (used only for temperature-0 or seeded runs)")
+    parser.add_argument("--temperature-zero", action="store_true",
+                        help="Sample greedily (temperature 0), so responses are reproducible and cached")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Fix the sampling seed, so responses are reproducible and cached")
+    parser.add_argument("--no-chunking", action="store_true",
+                        help="Send whole texts with the server's default num_ctx")
+    parser.add_argument("--max-num-ctx", type=int, default=MAX_NUM_CTX,
+                        help="Upper bound for the num_ctx chosen per run")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="Answer reports that state the group size explicitly without the LLM")
+    parser.add_argument("--validate-prefilter", action="store_true",
+                        help="Send prefiltered reports to the LLM anyway and report agreement")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream responses and stop generation once the JSON answer is complete")
+    parser.add_argument("--num-predict", type=int, default=NUM_PREDICT,
+                        help="Maximum number of tokens generated per request")
+    parser.add_argument("--structured", action="store_true",
+                        help="Constrain responses to the answer JSON schema through Ollama's format parameter")
+    parser.add_argument("--retries", type=int, default=DEFAULT_POLICY.max_attempts - 1,
+                        help="Retries with exponential backoff after connection or overload errors")
+    parser.add_argument("--parse-retries", type=int, default=DEFAULT_POLICY.parse_retries,
+                        help="Extra requests made for a response that cannot be parsed")
+    parser.add_argument("--prompt-layout", choices=PROMPT_LAYOUTS, default="inline",
+                        help="prefix: send the instructions as a fixed system message the server can cache")
+    parser.add_argument("--pack-size", type=int, default=None,
+                        help="Send up to this many documents per request, as many as fit num_ctx")
+    args = parser.parse_args()
+
+    install_signal_handlers()
+    cache = None if args.no_cache else ResponseCache()
+    dead_letter = DeadLetter()
+    client = make_client(args.hosts)
+    asyncio.run(process_txt_files(
+        args.model, args.output,
+        documents=load_documents(args.data_folder),
+        client=client,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        cache=cache,
+        batch_size=args.batch_size,
+        chunking=not args.no_chunking,
+        max_num_ctx=args.max_num_ctx,
+        prefilter=args.prefilter or args.validate_prefilter,
+        validate_prefilter=args.validate_prefilter,
+        stream=args.stream,
+        num_predict=args.num_predict,
+        structured=args.structured,
+        retry_policy=RetryPolicy(max_attempts=args.retries + 1, parse_retries=args.parse_retries),
+        dead_letter=dead_letter,
+        prompt_layout=args.prompt_layout,
+        pack_size=args.pack_size,
+        temperature=0 if args.temperature_zero else None,
+        seed=args.seed,
+    ))
+    if isinstance(client, ClientPool):
+        client.report()
+    if cache is not None:
+        cache.report()
+    dead_letter.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import numpy as np
+import pandas as pd
+from async_extraction import DATA_FOLDER, load_documents, process_txt_files
+from chunking import MAX_NUM_CTX
+from client_pool import make_client
+from mock_ollama_server import MockConfig, start_server
+from prompt_registry import PROMPTS
+from runner import MODEL_MATRIX, select_specs, close_client
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ground_truth_index import GroundTruthIndex
+
+PACK_SIZES = [1, 2, 4, 8]
+
+
+def score(rows, index):
+    """MAE of a run's rows against the ground truth, and how many documents have no count."""
+    predicted = pd.to_numeric(pd.Series([row["number_of_people"] for row in rows]), errors="coerce").to_numpy()
+    errors = np.abs(predicted - index.align([row["filename"] for row in rows]))
+    return float(np.nanmean(errors)) if np.isfinite(errors).any() else float("nan"), int(np.isnan(predicted).sum())
+
+
+async def bench(specs, documents, hosts, pack_sizes, max_num_ctx, index):
+    client = make_client(hosts)
+    summaries = []
+    try:
+        for spec in specs:
+            for pack_size in pack_sizes:
+                start = time.perf_counter()
+                rows = await process_txt_files(spec["model"], None, prompt_template=PROMPTS[spec["prompt"]],
+                                               options=spec["options"], documents=documents, client=client,
+                                               cache=None, max_num_ctx=max_num_ctx, pack_size=pack_size)
+                wall_time = time.perf_counter() - start
+                mae, missing = score(rows, index)
+                summaries.append({
+                    "run": spec["name"],
+                    "model": spec["model"],
+                    "Pack size": pack_size,
+                    "Documents": len(rows),
+                    "Answered in packs (%)": sum(1 for row in rows if row.get("pack", 1) > 1) / len(rows) * 100,
+                    "Docs/sec": len(rows) / wall_time,
+                    "MAE": mae,
+                    "Missing": missing,
+                })
+    finally:
+        await close_client(client)
+    return pd.DataFrame(summaries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and MAE of packed requests for several pack sizes.")
+    parser.add_argument("names", nargs="*",
+                        help="Run names from MODEL_MATRIX (default: every run with default options)")
+    parser.add_argument("--pack-sizes", default=",".join(map(str, PACK_SIZES)),
+                        help="Comma-separated pack sizes to compare; 1 sends one document per request")
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--hosts", default=None)
+    parser.add_argument("--max-num-ctx", type=int, default=MAX_NUM_CTX)
+    parser.add_argument("--mock", action="store_true",
+                        help="Benchmark against a local mock server answering with the ground truth")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="With --mock, fraction of documents left out of packed answers")
+    parser.add_argument("--output", default=None, help="Also write the table to this CSV file")
+    args = parser.parse_args()
+
+    specs = select_specs(args.names) if args.names else [spec for spec in MODEL_MATRIX if spec["options"] is None]
+    pack_sizes = [int(size) for size in args.pack_sizes.split(",")]
+    hosts = args.hosts
+    if args.mock:
+        server, hosts = start_server(MockConfig(answers="truth", drop_rate=args.drop_rate))
+
+    table = asyncio.run(bench(specs, load_documents(args.data_folder), hosts, pack_sizes, args.max_num_ctx,
+                              GroundTruthIndex.load()))
+    print(table.round(3).to_string(index=False))
+    if args.output:
+        table.round(3).to_csv(args.output, index=False)
+        print(f"Benchmark saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
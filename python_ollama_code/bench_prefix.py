@@ -0,0 +1,101 @@
+import asyncio
+import argparse
+import statistics
+import pandas as pd
+from async_extraction import DATA_FOLDER, load_documents, process_txt_files
+from chunking import MAX_NUM_CTX, plan_chunks
+from client_pool import make_client
+from mock_ollama_server import MockConfig, start_server
+from prompt_registry import PROMPTS, PROMPT_LAYOUTS
+from runner import MODEL_MATRIX, select_specs, close_client
+
+NANOSECONDS = 1e9
+
+
+def benchmark_targets(specs):
+    """Distinct (model, prompt) pairs of the given matrix entries, in matrix order."""
+    targets = []
+    for spec in specs:
+        if (spec["model"], spec["prompt"]) not in targets:
+            targets.append((spec["model"], spec["prompt"]))
+    return targets
+
+
+async def measure(client, model, prompt, documents, layout, num_ctx):
+    """
+    Runs the documents one at a time, so each request can reuse what the previous one
+    left in the server's cache. The first request fills the cache (and may load the
+    model), so it is left out.
+    """
+    rows = await process_txt_files(model, None, prompt_template=prompt, documents=documents, client=client,
+                                   concurrency=1, cache=None, num_ctx=num_ctx, prompt_layout=layout)
+    return rows[1:]
+
+
+def summarize(model, prompt_name, layout, rows):
+    timed = [row for row in rows if not row["error"] and row["prompt_eval_duration"] is not None]
+    mean = lambda field: statistics.mean(row[field] for row in timed) if timed else float("nan")
+    return {
+        "model": model,
+        "prompt": prompt_name,
+        "layout": layout,
+        "Documents": len(timed),
+        "Prompt tokens/doc": mean("prompt_eval_count"),
+        "Prompt eval (ms/doc)": mean("prompt_eval_duration") / NANOSECONDS * 1000,
+        "Latency (s/doc)": mean("latency"),
+    }
+
+
+async def bench(targets, documents, hosts, max_num_ctx):
+    client = make_client(hosts)
+    summaries = []
+    try:
+        for model, prompt_name in targets:
+            prompts = {layout: PROMPTS.with_layout(PROMPTS[prompt_name], layout) for layout in PROMPT_LAYOUTS}
+            # One num_ctx for both layouts, so the model is not reloaded in between
+            num_ctx = max(plan_chunks(documents, model, prompt, max_num_ctx)[0] for prompt in prompts.values())
+            for layout, prompt in prompts.items():
+                rows = await measure(client, model, prompt, documents, layout, num_ctx)
+                summaries.append(summarize(model, prompt_name, layout, rows))
+    finally:
+        await close_client(client)
+    return pd.DataFrame(summaries)
+
+
+def savings(table):
+    """Prompt evaluation saved by the prefix layout, per model and prompt, in percent."""
+    pivot = table.pivot_table(index=["model", "prompt"], columns="layout", values="Prompt eval (ms/doc)",
+                              sort=False)
+    return ((1 - pivot["prefix"] / pivot["inline"]) * 100).rename("Prompt eval saved (%)").reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prompt evaluation time per document with the inline and the prefix prompt layout.")
+    parser.add_argument("names", nargs="*",
+                        help="Run names from MODEL_MATRIX (default: every run with default options)")
+    parser.add_argument("--documents", type=int, default=20, help="Documents sent per model and layout")
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--hosts", default=None)
+    parser.add_argument("--max-num-ctx", type=int, default=MAX_NUM_CTX)
+    parser.add_argument("--mock", action="store_true",
+                        help="Benchmark against a local mock server that simulates prompt caching")
+    parser.add_argument("--output", default=None, help="Also write the table to this CSV file")
+    args = parser.parse_args()
+
+    specs = select_specs(args.names) if args.names else [spec for spec in MODEL_MATRIX if spec["options"] is None]
+    documents = load_documents(args.data_folder)[:args.documents + 1]
+    hosts = args.hosts
+    if args.mock:
+        server, hosts = start_server(MockConfig(prompt_cache=True))
+
+    table = asyncio.run(bench(benchmark_targets(specs), documents, hosts, args.max_num_ctx))
+    table = table.merge(savings(table), on=["model", "prompt"])
+    print(table.round(2).to_string(index=False))
+    if args.output:
+        table.round(3).to_csv(args.output, index=False)
+        print(f"Benchmark saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import time
+import argparse
+from jinja2 import Template
+from async_extraction import DATA_FOLDER, load_documents
+from prompt_registry import PROMPTS
+
+
+def bench(label, prepare, documents, repeat):
+    """Times prepare(text, filename) over the corpus and prints the per-document cost."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for filename, text in documents:
+            prepare(text, filename)
+    per_doc = (time.perf_counter() - start) / (repeat * len(documents))
+    print(f"{label:<32}{per_doc * 1e6:>10.1f} us/doc")
+    return per_doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-document prompt preparation cost, before and after the registry.")
+    parser.add_argument("--prompt", default="en", choices=PROMPTS.names())
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    args = parser.parse_args()
+
+    documents = load_documents(args.data_folder)
+    prompt = PROMPTS[args.prompt]
+
+    # Before: every call built and compiled a Template from the inline string
+    before = bench("Template(...) per document", lambda text, filename: Template(prompt.source).render(
+        text=text, filename=filename), documents, args.repeat)
+    # After: compiled once by the registry, rendered per document
+    after = bench("PromptRegistry.render", lambda text, filename: prompt.render(
+        text=text, filename=filename), documents, args.repeat)
+
+    print(f"Prompt '{args.prompt}' version {prompt.version}: {before / after:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import Counter
+import pandas as pd
+from async_extraction import DATA_FOLDER, MAX_CONCURRENCY, REQUEST_TIMEOUT, load_documents, process_txt_files
+from client_pool import make_client
+from prompt_registry import PROMPTS
+from rule_based import extract_rule_based
+from runner import select_specs, close_client
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+from ground_truth_index import GroundTruthIndex
+
+# Run names from MODEL_MATRIX, cheapest first; the last tier answers whatever is left
+TIERS = ["llama_1B", "llama_3B", "llama_8B", "gemma_9B", "phi4", "mixtral"]
+# Answers requested per document at each tier
+SAMPLES = 2
+# Temperature of every sample, so that an unsure model can disagree with itself
+SAMPLE_TEMPERATURE = 0.8
+# Share of the samples that must give the majority count for a tier to keep a document
+AGREEMENT = 1.0
+
+# Per-document answers, scored by accuracy_script.py like any other run
+CASCADE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cascade_output.csv")
+REPORT_FILE = os.path.join(ROOT_DIR, "results", "cascade_report.csv")
+
+
+def sample_options(spec, sample):
+    """Ollama options of one sample: the run's own, at SAMPLE_TEMPERATURE, with the sample number as seed."""
+    return {**(spec["options"] or {}), "temperature": SAMPLE_TEMPERATURE, "seed": sample}
+
+
+def compute_seconds(rows):
+    """Server time spent on rows: Ollama's total_duration where reported, the latency otherwise."""
+    return sum(row["total_duration"] / 1e9 if row.get("total_duration") is not None else row["latency"]
+               for row in rows)
+
+
+def _as_count(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def decide(counts, rule_count=None, agreement=AGREEMENT):
+    """
+    Majority count of a tier's samples and whether the tier can keep the document.
+    The majority must hold at least the agreement share of the samples and, when the
+    rule-based extractor read a count, also match it. Failed samples count as
+    disagreement. Returns (count, share, confident).
+    """
+    valid = [count for count in map(_as_count, counts) if count is not None]
+    if not valid:
+        return None, 0.0, False
+    count, votes = Counter(valid).most_common(1)[0]
+    share = votes / len(counts)
+    confident = share >= agreement and (rule_count is None or count == rule_count)
+    return count, share, confident
+
+
+async def run_tier(spec, documents, client, samples, engine_options):
+    """
+    Asks one tier for every document, samples times. The samples run concurrently and
+    share one semaphore, so concurrency bounds the tier's requests as a whole.
+    Returns {filename: [row, ...]}.
+    """
+    semaphore = asyncio.Semaphore(engine_options.get("concurrency", MAX_CONCURRENCY))
+    runs = await asyncio.gather(*(
+        process_txt_files(spec["model"], None, prompt_template=PROMPTS[spec["prompt"]],
+                          options=sample_options(spec, sample), documents=documents, client=client,
+                          cache=None, semaphore=semaphore, **engine_options)
+        for sample in range(samples)
+    ))
+    rows = {filename: [] for filename, _ in documents}
+    for results in runs:
+        for row in results:
+            rows[row["filename"]].append(row)
+    return rows
+
+
+async def cascade(tiers, documents, index, client, samples=SAMPLES, agreement=AGREEMENT, **engine_options):
+    """
+    Runs the tiers in order, each on the documents the previous ones were unsure about.
+    Returns (one decision per document, one report row per tier, with the MAE of the
+    documents the tier kept).
+    """
+    rules = {filename: extract_rule_based(text) for filename, text in documents}
+    pending = documents
+    decisions = {}
+    report = []
+    for level, spec in enumerate(tiers, 1):
+        start = time.perf_counter()
+        rows = await run_tier(spec, pending, client, samples, engine_options)
+        wall_time = time.perf_counter() - start
+
+        escalated = []
+        for filename, text in pending:
+            rule = rules[filename]
+            counts = [row["number_of_people"] for row in rows[filename]]
+            count, share, confident = decide(counts, rule["number_of_people"] if rule else None, agreement)
+            if confident or level == len(tiers):
+                decisions[filename] = {
+                    "filename": filename,
+                    "number_of_people": count,
+                    "model": "cascade",
+                    "tier": level,
+                    "tier_model": spec["model"],
+                    "agreement": share,
+                    "samples": json.dumps(counts),
+                    "rule_number": rule["number_of_people"] if rule else None,
+                    "confident": confident,
+                }
+            else:
+                escalated.append((filename, text))
+
+        report.append({
+            "Tier": level,
+            "run": spec["name"],
+            "model": spec["model"],
+            "Sent": len(pending),
+            "Resolved": len(pending) - len(escalated),
+            "Resolved (%)": (len(pending) - len(escalated)) / len(documents) * 100,
+            "Compute (s)": compute_seconds(row for tier_rows in rows.values() for row in tier_rows),
+            "Wall (s)": wall_time,
+            "MAE": mae([decision for decision in decisions.values() if decision["tier"] == level], index),
+        })
+        print(f"Tier {level} ({spec['model']}): kept {len(pending) - len(escalated)} of {len(pending)} "
+              f"document(s), escalating {len(escalated)}")
+        pending = escalated
+        if not pending:
+            break
+
+    return [decisions[filename] for filename, _ in documents], report
+
+
+def mae(rows, index):
+    if not rows:
+        return float("nan")
+    predicted = pd.to_numeric(pd.Series([row["number_of_people"] for row in rows], dtype=object), errors="coerce")
+    return float((predicted - index.align([row["filename"] for row in rows])).abs().mean())
+
+
+async def compare(tiers, documents, index, hosts=None, samples=SAMPLES, agreement=AGREEMENT, baseline=True,
+                  **engine_options):
+    """
+    Runs the cascade and, with baseline, its last tier alone over every document.
+    Returns (decisions, per-tier report with TOTAL and baseline rows).
+    """
+    client = make_client(hosts)
+    try:
+        decisions, report = await cascade(tiers, documents, index, client, samples, agreement, **engine_options)
+        report.append({"Tier": "TOTAL", "run": "cascade", "model": "cascade", "Sent": len(documents),
+                       "Resolved": len(decisions), "Resolved (%)": 100.0,
+                       "Compute (s)": sum(row["Compute (s)"] for row in report),
+                       "Wall (s)": sum(row["Wall (s)"] for row in report), "MAE": mae(decisions, index)})
+
+        if baseline:
+            spec = tiers[-1]
+            start = time.perf_counter()
+            rows = await process_txt_files(spec["model"], None, prompt_template=PROMPTS[spec["prompt"]],
+                                           options=spec["options"], documents=documents, client=client,
+                                           cache=None, **engine_options)
+            report.append({"Tier": "BASELINE", "run": spec["name"], "model": spec["model"],
+                           "Sent": len(documents), "Resolved": len(rows), "Resolved (%)": 100.0,
+                           "Compute (s)": compute_seconds(rows), "Wall (s)": time.perf_counter() - start,
+                           "MAE": mae(rows, index)})
+    finally:
+        await close_client(client)
+    return decisions, pd.DataFrame(report)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Confidence-gated cascade from small to large models, compared with the largest alone.")
+    parser.add_argument("--tiers", default=",".join(TIERS),
+                        help="Comma-separated run names from MODEL_MATRIX, cheapest first")
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="Answers requested per document and tier")
+    parser.add_argument("--agreement", type=float, default=AGREEMENT,
+                        help="Share of samples that must agree for a tier to keep a document")
+    parser.add_argument("--no-baseline", action="store_true", help="Do not run the last tier alone for comparison")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument("--hosts", default=None)
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--output", default=CASCADE_FILE, help="CSV of the cascade's answer per document")
+    parser.add_argument("--report", default=REPORT_FILE, help="CSV of the per-tier report")
+    args = parser.parse_args()
+
+    names = args.tiers.split(",")
+    tiers = sorted(select_specs(names), key=lambda spec: names.index(spec["name"]))
+    decisions, report = asyncio.run(compare(tiers, load_documents(args.data_folder), GroundTruthIndex.load(),
+                                            args.hosts, args.samples, args.agreement, not args.no_baseline,
+                                            concurrency=args.concurrency, timeout=args.timeout))
+
+    pd.DataFrame(decisions).to_csv(args.output, index=False)
+    report.round(3).to_csv(args.report, index=False)
+    print(report.round(3).to_string(index=False))
+    if not args.no_baseline:
+        total, alone = report.iloc[-2], report.iloc[-1]
+        print(f"Cascade: MAE {total['MAE']:.3f} in {total['Compute (s)']:.1f}s of compute; "
+              f"{alone['model']} alone: MAE {alone['MAE']:.3f} in {alone['Compute (s)']:.1f}s "
+              f"({alone['Compute (s)'] / total['Compute (s)']:.1f}x the compute)")
+    print(f"Answers saved to {args.output}, report to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import json
+from result_sink import ResultSink
+
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "checkpoint.jsonl")
+
+
+class Checkpoint:
+    """
+    Journal of completed (run, filename) pairs.
+    Every finished document is appended and fsynced, so an interrupted sweep
+    can be restarted without redoing the documents it already has.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._entries = {}
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a half-written last line
+                    continue
+                # Later entries win, which deduplicates repeated documents
+                self._entries.setdefault(entry["run"], {})[entry["row"]["filename"]] = entry
+
+    def completed(self, run_name):
+        """Returns the set of filenames already done for a run."""
+        return set(self._entries.get(run_name, {}))
+
+    def pending(self, run_name, documents):
+        """Filters (filename, text) pairs down to those not yet done for a run."""
+        done = self.completed(run_name)
+        return [(filename, text) for filename, text in documents if filename not in done]
+
+    def record(self, run_name, model, row):
+        """Durably marks one document as done."""
+        entry = {"run": run_name, "model": model, "row": row}
+        self._entries.setdefault(run_name, {})[row["filename"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def rows(self, run_name):
+        """Returns the deduplicated rows of a run, sorted by filename."""
+        return [entry["row"] for _, entry in sorted(self._entries.get(run_name, {}).items())]
+
+    def write_output(self, run_name, output_path):
+        """Atomically replaces output_path with the deduplicated rows of a run."""
+        with ResultSink(output_path, atomic=True) as sink:
+            for row in self.rows(run_name):
+                sink.add(row)
+
+    def clear(self, run_name=None):
+        """Forgets every run, or a single one, and rewrites the journal."""
+        if run_name is None:
+            self._entries = {}
+        else:
+            self._entries.pop(run_name, None)
+
+        self._file.close()
+        with open(self.path, "w", encoding="utf-8") as file:
+            for entries in self._entries.values():
+                for entry in entries.values():
+                    file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
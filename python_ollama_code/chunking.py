@@ -0,0 +1,152 @@
+import re
+import math
+
+# Conservative characters-per-token ratio for French/English outing reports
+CHARS_PER_TOKEN = 3.5
+# Tokens kept free for the JSON answer
+RESPONSE_TOKENS = 256
+# Tokens repeated at the start of the next chunk so a sentence cut at a boundary is not lost
+OVERLAP_TOKENS = 64
+# num_ctx values tried in order; larger contexts cost memory and prompt time
+NUM_CTX_STEPS = [2048, 4096, 8192, 16384, 32768]
+# Never ask for more context than this, even if the model supports it
+MAX_NUM_CTX = 8192
+# Tokens a document adds to a packed request besides its text: its header, its line
+# in the JSON skeleton and its answer object
+PACKED_DOCUMENT_TOKENS = 48
+
+# Trained context window of each model tag
+CONTEXT_WINDOWS = {
+    "deepseek-r1": 131072,
+    "gemma2": 8192,
+    "gemma2:2b": 8192,
+    "llama3.1:8b": 131072,
+    "llama3.2:1b": 131072,
+    "llama3.2:3b": 131072,
+    "mistral": 32768,
+    "mixtral:8x7b": 32768,
+    "phi3.5": 131072,
+    "phi3:medium": 4096,
+    "phi4": 16384,
+}
+DEFAULT_CONTEXT_WINDOW = 2048
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def estimate_tokens(text):
+    """Rough token count of a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def context_limit(model, max_num_ctx=MAX_NUM_CTX):
+    """Largest num_ctx we are willing to use for a model."""
+    return min(CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW), max_num_ctx)
+
+
+def choose_num_ctx(needed_tokens, limit):
+    """Smallest num_ctx step that holds needed_tokens, capped at limit."""
+    for step in NUM_CTX_STEPS:
+        if step >= needed_tokens:
+            return min(step, limit)
+    return limit
+
+
+def split_text(text, max_tokens, overlap_tokens=OVERLAP_TOKENS):
+    """Splits a text on sentence boundaries into overlapping segments of at most max_tokens."""
+    max_chars = max(int(max_tokens * CHARS_PER_TOKEN), 1)
+    overlap_chars = int(overlap_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return [text]
+
+    # Sentences longer than a whole chunk are hard-split
+    sentences = []
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        if sentence:
+            sentences.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    chunks = []
+    current = []
+    length = 0
+    for sentence in sentences:
+        if current and length + len(sentence) + 1 > max_chars:
+            chunks.append(" ".join(current))
+            # Carry the tail of the previous chunk over as overlap
+            carried = []
+            carried_length = 0
+            for previous in reversed(current):
+                if carried_length + len(previous) + 1 > overlap_chars:
+                    break
+                carried.insert(0, previous)
+                carried_length += len(previous) + 1
+            current, length = carried, carried_length
+            if length + len(sentence) + 1 > max_chars:
+                current, length = [], 0
+        current.append(sentence)
+        length += len(sentence) + 1
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def plan_chunks(documents, model, prompt_template, max_num_ctx=MAX_NUM_CTX, num_ctx=None):
+    """
+    Picks one num_ctx for a whole run (unless given) and splits the documents that do not fit it.
+    A single value per run matters: Ollama reloads the model whenever num_ctx changes.
+    Returns (num_ctx, [(filename, [chunk, ...]), ...]).
+    """
+    overhead = estimate_tokens(prompt_template.render(text="", filename="00000.txt")) + RESPONSE_TOKENS
+
+    if num_ctx is None:
+        needed = max((overhead + estimate_tokens(text) for _, text in documents), default=overhead)
+        num_ctx = choose_num_ctx(needed, context_limit(model, max_num_ctx))
+
+    budget = num_ctx - overhead
+    if budget <= OVERLAP_TOKENS:
+        raise ValueError(f"num_ctx {num_ctx} leaves no room for text with this prompt ({overhead} tokens)")
+    return num_ctx, [(filename, split_text(text, budget)) for filename, text in documents]
+
+
+def pack_documents(documents, packed_prompt, num_ctx, max_pack):
+    """
+    Groups documents, in order, into packs of at most max_pack that fit num_ctx
+    together with the packed prompt and all their answers. A document too long to
+    share the context ends up alone in its pack.
+    Returns [[(filename, text), ...], ...].
+    """
+    budget = num_ctx - estimate_tokens(packed_prompt.render(documents=[])) - RESPONSE_TOKENS
+    packs = []
+    current = []
+    used = 0
+    for filename, text in documents:
+        cost = estimate_tokens(text) + PACKED_DOCUMENT_TOKENS
+        if current and (len(current) >= max_pack or used + cost > budget):
+            packs.append(current)
+            current, used = [], 0
+        current.append((filename, text))
+        used += cost
+
+    if current:
+        packs.append(current)
+    return packs
+
+
+def merge_counts(counts):
+    """
+    Reduces per-chunk counts to one document count.
+    Chunks overlap and the group is usually described more than once, so the
+    largest count wins rather than the sum; failed or non-numeric counts are ignored.
+    """
+    valid = [number for number in map(_as_number, counts) if number is not None]
+    if not valid:
+        return None
+    best = max(valid)
+    return int(best) if best.is_integer() else best
+
+
+def _as_number(count):
+    try:
+        return float(count)
+    except (TypeError, ValueError):
+        return None
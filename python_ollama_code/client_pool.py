@@ -0,0 +1,219 @@
+import os
+import time
+import asyncio
+from ollama import AsyncClient, ResponseError
+from resilience import classify_error
+
+# Comma-separated Ollama endpoints used when --hosts is not given
+HOSTS_ENV = "OLLAMA_HOSTS"
+# Consecutive connection/overload failures after which a host is drained
+FAIL_THRESHOLD = 3
+# Seconds a drained host is left alone before it is health-checked again
+DRAIN_SECONDS = 30.0
+# Seconds between active health checks of drained hosts
+HEALTH_INTERVAL = 10.0
+# Seconds a health check may take
+HEALTH_TIMEOUT = 5.0
+
+
+class Host:
+    """One Ollama endpoint with its load and health bookkeeping."""
+
+    def __init__(self, url, client):
+        self.url = url
+        self.client = client
+        self.outstanding = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_time = 0.0
+        self.consecutive_failures = 0
+        self.drained_until = 0.0
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.drained_until
+
+
+class ClientPool:
+    """
+    Spreads chat and generate requests over several Ollama hosts.
+    Each request goes to the healthy host with the fewest requests in flight.
+    A host that fails fail_threshold times in a row (connection errors, timeouts,
+    overload statuses) is drained for drain_seconds; a background task keeps
+    health-checking drained hosts and puts them back once they answer.
+    Exposes the chat/generate interface of ollama.AsyncClient, so it can be passed
+    wherever a client is expected.
+    """
+
+    def __init__(self, hosts, fail_threshold=FAIL_THRESHOLD, drain_seconds=DRAIN_SECONDS,
+                 health_interval=HEALTH_INTERVAL, **client_kwargs):
+        if not hosts:
+            raise ValueError("ClientPool needs at least one host.")
+        self.hosts = [Host(url, AsyncClient(host=url, **client_kwargs)) for url in hosts]
+        self.fail_threshold = fail_threshold
+        self.drain_seconds = drain_seconds
+        self.health_interval = health_interval
+        self._started = time.monotonic()
+        self._monitor = None
+
+    def _acquire(self):
+        self._ensure_monitor()
+        candidates = [host for host in self.hosts if host.healthy]
+        if not candidates:
+            # ConnectionError is retried with backoff by resilience.call_with_retries
+            raise ConnectionError("No healthy Ollama host in the pool.")
+        # Ties go to the host that has served the fewest requests
+        host = min(candidates, key=lambda candidate: (candidate.outstanding, candidate.completed))
+        host.outstanding += 1
+        return host, time.perf_counter()
+
+    def _release(self, host, start, error=None):
+        host.outstanding -= 1
+        host.busy_time += time.perf_counter() - start
+        if error is not None and classify_error(error) != "fatal":
+            host.failed += 1
+            host.consecutive_failures += 1
+            if host.consecutive_failures >= self.fail_threshold and host.healthy:
+                host.drained_until = time.monotonic() + self.drain_seconds
+                print(f"Draining {host.url} after {host.consecutive_failures} consecutive failures")
+        else:
+            # Any HTTP answer, even an error status, shows the host is up
+            host.completed += 1
+            host.consecutive_failures = 0
+
+    async def chat(self, **kwargs):
+        host, start = self._acquire()
+        try:
+            result = await host.client.chat(**kwargs)
+        except Exception as e:
+            self._release(host, start, e)
+            raise
+        except BaseException:
+            # Cancelled, typically by the caller's asyncio.wait_for: the host did not answer in time
+            self._release(host, start, asyncio.TimeoutError())
+            raise
+        if kwargs.get("stream"):
+            # The request stays outstanding until the stream is consumed or closed
+            return self._relay(host, start, result)
+        self._release(host, start)
+        return result
+
+    async def _relay(self, host, start, stream):
+        error = None
+        received = False
+        try:
+            async for part in stream:
+                received = True
+                yield part
+        except Exception as e:
+            error = e
+            raise
+        except asyncio.CancelledError:
+            # Cancelled while waiting for the next part: the host stalled
+            error = asyncio.TimeoutError()
+            raise
+        except GeneratorExit:
+            # Closing after some parts is how streaming extraction stops generation early;
+            # a stream abandoned before its first part counts as a timeout
+            if not received:
+                error = asyncio.TimeoutError()
+            raise
+        finally:
+            await stream.aclose()
+            self._release(host, start, error)
+
+    async def generate(self, **kwargs):
+        """
+        Routes a generate request. An empty prompt only loads or unloads a model
+        (as in run_scripts.load_model), so it is sent to every healthy host instead.
+        """
+        if kwargs.get("prompt"):
+            host, start = self._acquire()
+            try:
+                result = await host.client.generate(**kwargs)
+            except Exception as e:
+                self._release(host, start, e)
+                raise
+            except BaseException:
+                self._release(host, start, asyncio.TimeoutError())
+                raise
+            self._release(host, start)
+            return result
+
+        targets = [host for host in self.hosts if host.healthy]
+        results = await asyncio.gather(*(host.client.generate(**kwargs) for host in targets),
+                                       return_exceptions=True)
+        for host, result in zip(targets, results):
+            if isinstance(result, Exception):
+                print(f"{host.url}: {type(result).__name__}: {result}")
+        if targets and all(isinstance(result, Exception) for result in results):
+            raise results[0]
+        return next((result for result in results if not isinstance(result, Exception)), None)
+
+    async def check(self, host):
+        """Active health check: the host is alive if it answers any HTTP request in time."""
+        try:
+            await asyncio.wait_for(host.client.list(), timeout=HEALTH_TIMEOUT)
+        except ResponseError:
+            pass
+        except Exception:
+            return False
+        return True
+
+    async def check_all(self):
+        """Checks every host now, draining the dead ones and restoring the live ones."""
+        alive = await asyncio.gather(*(self.check(host) for host in self.hosts))
+        for host, ok in zip(self.hosts, alive):
+            self._mark(host, ok)
+        return dict(zip((host.url for host in self.hosts), alive))
+
+    def _mark(self, host, ok):
+        if ok and not host.healthy:
+            print(f"{host.url} is back, returning it to the pool")
+            host.drained_until = 0.0
+            host.consecutive_failures = 0
+        elif not ok and host.healthy:
+            print(f"{host.url} failed its health check, draining it")
+            host.drained_until = time.monotonic() + self.drain_seconds
+
+    def _ensure_monitor(self):
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.get_running_loop().create_task(self._watch())
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            drained = [host for host in self.hosts if not host.healthy]
+            for host, ok in zip(drained, await asyncio.gather(*(self.check(host) for host in drained))):
+                if ok:
+                    self._mark(host, True)
+
+    async def close(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+    def report(self):
+        """Prints requests, failures, mean latency and throughput per host."""
+        elapsed = time.monotonic() - self._started
+        total = sum(host.completed for host in self.hosts) or 1
+        print(f"{'Host':<32}{'Requests':>10}{'Failed':>8}{'Share':>8}{'Mean (s)':>10}{'Req/sec':>10}  State")
+        for host in self.hosts:
+            mean = host.busy_time / (host.completed + host.failed) if host.completed + host.failed else 0.0
+            state = "ok" if host.healthy else "drained"
+            print(f"{host.url:<32}{host.completed:>10}{host.failed:>8}{host.completed / total:>8.1%}"
+                  f"{mean:>10.2f}{host.completed / elapsed:>10.2f}  {state}")
+
+
+def parse_hosts(value=None):
+    """Splits a comma-separated host list, falling back to the OLLAMA_HOSTS variable."""
+    value = value if value is not None else os.environ.get(HOSTS_ENV, "")
+    return [host.strip() for host in value.split(",") if host.strip()]
+
+
+def make_client(hosts=None):
+    """A plain AsyncClient for zero or one host, a ClientPool for several."""
+    hosts = parse_hosts(hosts) if not isinstance(hosts, list) else hosts
+    if len(hosts) > 1:
+        return ClientPool(hosts)
+    return AsyncClient(host=hosts[0]) if hosts else AsyncClient()
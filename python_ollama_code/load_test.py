@@ -0,0 +1,100 @@
+import time
+import asyncio
+import argparse
+import statistics
+from async_extraction import MAX_CONCURRENCY, DATA_FOLDER, load_documents, process_txt_files
+from client_pool import make_client, ClientPool
+from mock_ollama_server import start_server, add_mock_arguments, mock_config
+from resilience import RetryPolicy
+
+MODEL = "mock"
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers (q in 0-100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    index = min(max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0), len(ordered) - 1)
+    return ordered[index]
+
+
+def scale_corpus(documents, repeat):
+    """Repeats the corpus under distinct filenames so that longer runs can be measured."""
+    if repeat <= 1:
+        return documents
+    return [(f"{copy}_{filename}" if copy else filename, text)
+            for copy in range(repeat) for filename, text in documents]
+
+
+async def drive(documents, hosts, concurrency, stream, structured, retries):
+    client = make_client(hosts)
+    start = time.perf_counter()
+    rows = await process_txt_files(MODEL, None, documents=documents, client=client, concurrency=concurrency,
+                                   stream=stream, structured=structured, cache=None,
+                                   retry_policy=RetryPolicy(max_attempts=retries + 1, base_delay=0.05))
+    wall_time = time.perf_counter() - start
+    if isinstance(client, ClientPool):
+        await client.close()
+        client.report()
+    return rows, wall_time
+
+
+def report(rows, wall_time, service_times):
+    """Prints throughput, latency percentiles and the pipeline's own time per document."""
+    latencies = [row["latency"] for row in rows if not row["error"]]
+    failed = sum(1 for row in rows if row["error"])
+    print(f"\n{len(rows)} documents in {wall_time:.2f}s: {len(rows) / wall_time:.2f} docs/sec, {failed} failed")
+    if latencies:
+        print(f"Latency p50={percentile(latencies, 50):.3f}s p95={percentile(latencies, 95):.3f}s "
+              f"p99={percentile(latencies, 99):.3f}s max={max(latencies):.3f}s")
+
+    # Whatever the client measured beyond the server's own service time is pipeline overhead:
+    # HTTP, JSON (de)serialisation, parsing and event-loop scheduling
+    overheads = [row["latency"] - service_times[row["filename"]]
+                 for row in rows if not row["error"] and row["filename"] in service_times]
+    if overheads:
+        print(f"Pipeline overhead per document mean={statistics.mean(overheads) * 1000:.1f}ms "
+              f"p50={percentile(overheads, 50) * 1000:.1f}ms p95={percentile(overheads, 95) * 1000:.1f}ms")
+        busy = sum(service_times.values())
+        print(f"Server busy {busy:.2f}s across requests; wall time {wall_time:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the extraction pipeline against local mock Ollama servers.")
+    parser.add_argument("--servers", type=int, default=1, help="Mock servers to start and balance over")
+    parser.add_argument("--hosts", default=None,
+                        help="Use already running servers (comma-separated) instead of starting mocks; "
+                             "overhead is only reported for started mocks")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--repeat", type=int, default=1, help="Copies of the corpus to send")
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--structured", action="store_true")
+    parser.add_argument("--retries", type=int, default=3)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    servers = []
+    hosts = args.hosts
+    if hosts is None:
+        config = mock_config(args)
+        started = [start_server(config) for _ in range(args.servers)]
+        servers = [server for server, _ in started]
+        hosts = [url for _, url in started]
+        print(f"Started {len(hosts)} mock server(s): {', '.join(hosts)}")
+
+    documents = scale_corpus(load_documents(args.data_folder), args.repeat)
+    rows, wall_time = asyncio.run(drive(documents, hosts, args.concurrency, args.stream, args.structured,
+                                        args.retries))
+
+    service_times = {}
+    for server in servers:
+        for filename, seconds in server.stats.service_times().items():
+            service_times[filename] = service_times.get(filename, 0.0) + seconds
+        server.shutdown()
+    report(rows, wall_time, service_times)
+
+
+if __name__ == "__main__":
+    main()
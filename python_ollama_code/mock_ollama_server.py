@@ -0,0 +1,348 @@
+import os
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from rule_based import extract_rule_based
+
+GROUND_TRUTH_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ground_truth", "list_50.xlsx")
+
+FILENAME_IN_PROMPT = re.compile(r'"filename":\s*"([^"]+)"')
+# Sections of a packed prompt: "### Document <filename>" followed by the text
+DOCUMENT_IN_PROMPT = re.compile(r"^### Document (\S+)\n(.*?)(?=^### Document |^[^\n]*\n```json|\Z)", re.M | re.S)
+# Roughly one token per four characters of answer text
+CHARS_PER_TOKEN = 4
+
+
+class LatencyDistribution:
+    """
+    Time before the first token, parsed from "fixed:S", "uniform:LOW,HIGH",
+    "normal:MEAN,STD" or "lognormal:MEDIAN,SIGMA" (seconds).
+    """
+
+    def __init__(self, spec="fixed:0.05"):
+        self.spec = spec
+        kind, _, values = spec.partition(":")
+        params = [float(value) for value in values.split(",") if value]
+        samplers = {
+            "fixed": lambda: params[0],
+            "uniform": lambda: random.uniform(params[0], params[1]),
+            "normal": lambda: random.gauss(params[0], params[1]),
+            "lognormal": lambda: params[0] * random.lognormvariate(0, params[1]),
+        }
+        if kind not in samplers:
+            raise ValueError(f"Unknown latency distribution '{kind}'; use one of {', '.join(samplers)}")
+        self._sample = samplers[kind]
+
+    def sample(self):
+        return max(self._sample(), 0.0)
+
+
+class Answers:
+    """
+    Decides the count a mock model answers with:
+    "fixed:N" always N, "rule" the rule_based extractor on the prompt (1 when no rule
+    fires), "truth" the ground-truth count of the filename named in the prompt.
+    """
+
+    def __init__(self, spec="rule"):
+        self.spec = spec
+        kind, _, value = spec.partition(":")
+        self.kind = kind
+        if kind == "fixed":
+            self.fixed = int(value or 2)
+        elif kind == "truth":
+            import pandas as pd
+            truth = pd.read_excel(GROUND_TRUTH_PATH)
+            self.truth = dict(zip(truth["filename"], truth["Truth"].astype(int)))
+        elif kind != "rule":
+            raise ValueError(f"Unknown answer mode '{kind}'; use fixed:N, rule or truth")
+
+    def count(self, prompt, filename=None):
+        filename = filename or self.filename(prompt)
+        if self.kind == "fixed":
+            return self.fixed
+        if self.kind == "truth":
+            return self.truth.get(filename, 1)
+        rule = extract_rule_based(prompt)
+        return rule["number_of_people"] if rule else 1
+
+    @staticmethod
+    def filename(prompt):
+        match = FILENAME_IN_PROMPT.search(prompt)
+        return match.group(1) if match else None
+
+
+class MockConfig:
+    """Behaviour of a mock server; see the command-line flags for the meaning of each field."""
+
+    def __init__(self, latency="fixed:0.05", token_rate=50.0, error_rate=0.0, error_status=503,
+                 answers="rule", prose=False, parallel=4, prompt_cache=False, drop_rate=0.0):
+        self.latency = LatencyDistribution(latency)
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.answers = Answers(answers)
+        self.prose = prose
+        self.parallel = parallel
+        self.prompt_cache = prompt_cache
+        self.drop_rate = drop_rate
+
+
+class PromptCache:
+    """
+    Mimics the server's KV cache: per model, the prompt last evaluated in each of the
+    parallel slots. Only the part of a new prompt past its longest common prefix with
+    one of them has to be evaluated.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self._prompts = {}
+        self._lock = threading.Lock()
+
+    def evaluate(self, model, prompt):
+        """Stores the prompt in the slot sharing most of it; returns how many characters were not cached."""
+        with self._lock:
+            prompts = self._prompts.setdefault(model, [""] * self.slots)
+            shared = [len(os.path.commonprefix([prompt, previous])) for previous in prompts]
+            slot = max(range(len(prompts)), key=shared.__getitem__)
+            prompts[slot] = prompt
+            return len(prompt) - shared[slot]
+
+
+class MockStats:
+    """Server-side record of every request, for comparison with what the client measured."""
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def record(self, path, filename, service_time, status, answer_time=None):
+        with self._lock:
+            self.requests.append({"path": path, "filename": filename, "service_time": service_time,
+                                  "status": status, "answer_time": answer_time})
+
+    def service_times(self):
+        """
+        Summed service time per filename of the successful chat requests. For streams,
+        the time the JSON answer was fully sent is used, since a client may hang up there.
+        """
+        totals = {}
+        for request in self.requests:
+            if request["path"] == "/api/chat" and request["status"] == 200 and request["filename"]:
+                seconds = request["answer_time"] if request["answer_time"] is not None else request["service_time"]
+                totals[request["filename"]] = totals.get(request["filename"], 0.0) + seconds
+        return totals
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Implements the parts of the Ollama API the pipeline uses."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this Nagle delays every response by ~40ms
+    disable_nagle_algorithm = True
+    config = None
+    stats = None
+    slots = None
+    prompt_cache = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": []})
+        elif self.path == "/api/version":
+            self._send_json(200, {"version": "mock"})
+        else:
+            self._send_json(404, {"error": f"{self.path} not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/chat":
+            prompt = "\n".join(message.get("content", "") for message in request.get("messages", []))
+            self._complete(request, prompt, chat=True)
+        elif self.path == "/api/generate":
+            if not request.get("prompt"):
+                # Load/unload idiom: nothing to generate
+                reason = "unload" if request.get("keep_alive") in (0, "0") else "load"
+                self._send_json(200, {"model": request.get("model"), "created_at": _now(), "response": "",
+                                      "done": True, "done_reason": reason})
+                return
+            self._complete(request, request["prompt"], chat=False)
+        else:
+            self._send_json(404, {"error": f"{self.path} not found"})
+
+    def _complete(self, request, prompt, chat):
+        config = self.config
+        start = time.perf_counter()
+        documents = DOCUMENT_IN_PROMPT.findall(prompt)
+        filename = None if documents else Answers.filename(prompt)
+
+        with self.slots:
+            if random.random() < config.error_rate:
+                self._send_json(config.error_status, {"error": "injected failure"})
+                self.stats.record(self.path, filename, time.perf_counter() - start, config.error_status)
+                return
+
+            if documents:
+                # A packed prompt: one answer per document, some dropped as small models do
+                answer = json.dumps([{"filename": name, "number_of_people": config.answers.count(text, name)}
+                                     for name, text in documents if random.random() >= config.drop_rate])
+            else:
+                answer = json.dumps({"filename": filename or "", "number_of_people": config.answers.count(prompt)})
+            answer_end = len(answer)
+            if config.prose:
+                prefix = "Here is the result:\n"
+                answer_end += len(prefix)
+                answer = prefix + answer + "\nThe count only includes people on the outing."
+            tokens = [answer[i:i + CHARS_PER_TOKEN] for i in range(0, len(answer), CHARS_PER_TOKEN)]
+            num_predict = (request.get("options") or {}).get("num_predict")
+            if num_predict:
+                tokens = tokens[:num_predict]
+
+            prompt_time = config.latency.sample()
+            evaluated = len(prompt)
+            if self.prompt_cache is not None and prompt:
+                # A cached prefix is not evaluated again, so it takes no prompt time either
+                evaluated = self.prompt_cache.evaluate(request.get("model"), prompt)
+                prompt_time *= evaluated / len(prompt)
+            time.sleep(prompt_time)
+            answer_time = None
+            if request.get("stream", True):
+                answer_token = -(-answer_end // CHARS_PER_TOKEN) - 1
+                answer_time = self._stream(request, tokens, chat, start, evaluated, prompt_time, answer_token)
+            else:
+                time.sleep(len(tokens) / config.token_rate)
+                self._send_json(200, self._message(request, "".join(tokens), chat, True,
+                                                   self._timings(start, evaluated, prompt_time, len(tokens))))
+        self.stats.record(self.path, filename, time.perf_counter() - start, 200, answer_time)
+
+    def _stream(self, request, tokens, chat, start, evaluated, prompt_time, answer_token):
+        """Streams tokens at the configured rate; returns when the token ending the JSON answer was sent."""
+        answer_time = None
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for index, token in enumerate(tokens):
+                if index:
+                    time.sleep(1 / self.config.token_rate)
+                self._write_chunk(self._message(request, token, chat, False))
+                if index == answer_token:
+                    answer_time = time.perf_counter() - start
+            self._write_chunk(self._message(request, "", chat, True,
+                                            self._timings(start, evaluated, prompt_time, len(tokens))))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream early, as streaming extraction does
+            self.close_connection = True
+        return answer_time
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _message(self, request, content, chat, done, extra=None):
+        payload = {"model": request.get("model"), "created_at": _now(), "done": done}
+        if chat:
+            payload["message"] = {"role": "assistant", "content": content}
+        else:
+            payload["response"] = content
+        if done:
+            payload["done_reason"] = "stop"
+            payload.update(extra or {})
+        return payload
+
+    def _timings(self, start, evaluated, prompt_time, eval_count):
+        # Same fields and units (nanoseconds) as a real Ollama final message
+        return {
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": evaluated // CHARS_PER_TOKEN,
+            "prompt_eval_duration": int(prompt_time * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": int(eval_count / self.config.token_rate * 1e9),
+        }
+
+
+def start_server(config=None, host="127.0.0.1", port=0):
+    """
+    Starts a mock server in a background thread.
+    Returns (server, url); server.stats holds a MockStats, server.shutdown() stops it.
+    """
+    config = config or MockConfig()
+    stats = MockStats()
+    handler = type("Handler", (MockOllamaHandler,), {
+        "config": config, "stats": stats, "slots": threading.Semaphore(config.parallel),
+        "prompt_cache": PromptCache(config.parallel) if config.prompt_cache else None,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_mock_arguments(parser):
+    """Flags describing the mock model, shared with load_test.py."""
+    parser.add_argument("--latency", default="fixed:0.05",
+                        help="Time to first token: fixed:S, uniform:LOW,HIGH, normal:MEAN,STD "
+                             "or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Generated tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--answers", default="rule", help="fixed:N, rule or truth")
+    parser.add_argument("--prose", action="store_true", help="Wrap answers in prose, as chatty models do")
+    parser.add_argument("--parallel", type=int, default=4,
+                        help="Requests served at once, like OLLAMA_NUM_PARALLEL; the rest queue")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="Fraction of documents left out of the answer to a packed prompt")
+    parser.add_argument("--prompt-cache", action="store_true",
+                        help="Skip prompt evaluation for the prefix a slot already holds, as Ollama's KV cache does")
+
+
+def mock_config(args):
+    return MockConfig(latency=args.latency, token_rate=args.token_rate, error_rate=args.error_rate,
+                      error_status=args.error_status, answers=args.answers, prose=args.prose,
+                      parallel=args.parallel, prompt_cache=args.prompt_cache,
+                      drop_rate=args.drop_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Ollama server for offline runs and load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = start_server(mock_config(args), args.host, args.port)
+    print(f"Mock Ollama server listening on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
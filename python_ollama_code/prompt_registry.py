@@ -0,0 +1,107 @@
+import os
+import hashlib
+from jinja2 import Environment, FileSystemLoader, meta
+
+PROMPT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_templates")
+
+# Registry names of the prompt variants, mapped to their template files.
+# A (system, document) pair is a prefix layout: the instructions go out as a fixed
+# system message and only the document part changes from one request to the next.
+# The <name>_packed variants put several documents in one request.
+PROMPT_FILES = {
+    "en": "ski_outing_en.j2",
+    "fr": "ski_outing_fr.j2",
+    "en_compact": "ski_outing_en_compact.j2",
+    "en_prefix": ("ski_outing_en_system.j2", "ski_outing_en_document.j2"),
+    "fr_prefix": ("ski_outing_fr_system.j2", "ski_outing_fr_document.j2"),
+    "en_compact_prefix": ("ski_outing_en_compact_system.j2", "ski_outing_en_compact_document.j2"),
+    "en_packed": ("ski_outing_en_packed_system.j2", "ski_outing_en_packed.j2"),
+    "fr_packed": ("ski_outing_fr_packed_system.j2", "ski_outing_fr_packed.j2"),
+    "en_compact_packed": ("ski_outing_en_compact_packed_system.j2", "ski_outing_en_packed.j2"),
+}
+
+# Prompt layouts: "inline" sends one user message, "prefix" the <name>_prefix variant
+PROMPT_LAYOUTS = ["inline", "prefix"]
+
+
+class Prompt:
+    """
+    A compiled prompt template together with the hash of its source.
+    With a system text, the prompt is sent as that system message followed by the
+    rendered template as the user message.
+    """
+
+    def __init__(self, name, template, source, system=None):
+        self.name = name
+        self.template = template
+        self.source = source
+        self.system = system
+        self.version = hashlib.sha256(source.encode("utf-8")).hexdigest()[:12]
+
+    def messages(self, **context):
+        """The chat messages of one request."""
+        user = {"role": "user", "content": self.template.render(**context)}
+        if self.system is None:
+            return [user]
+        return [{"role": "system", "content": self.system}, user]
+
+    def render(self, **context):
+        """The whole prompt as one text, e.g. for token estimates and cache keys."""
+        return "\n\n".join(message["content"] for message in self.messages(**context))
+
+
+class PromptRegistry:
+    """Loads and compiles each prompt file once per process."""
+
+    def __init__(self, folder=PROMPT_FOLDER, files=PROMPT_FILES):
+        self.files = dict(files)
+        self._env = Environment(loader=FileSystemLoader(folder), keep_trailing_newline=True)
+        self._prompts = {}
+
+    def __getitem__(self, name):
+        if name not in self._prompts:
+            if name not in self.files:
+                raise KeyError(f"Unknown prompt '{name}'; available: {', '.join(self.files)}")
+            if isinstance(self.files[name], tuple):
+                self._prompts[name] = self._load_prefix(name, *self.files[name])
+            else:
+                source, _, _ = self._env.loader.get_source(self._env, self.files[name])
+                self._prompts[name] = Prompt(name, self._env.get_template(self.files[name]), source)
+        return self._prompts[name]
+
+    def _load_prefix(self, name, system_file, document_file):
+        system, _, _ = self._env.loader.get_source(self._env, system_file)
+        # The server only reuses its cached prompt prefix if the system text is byte-identical
+        variables = meta.find_undeclared_variables(self._env.parse(system))
+        if variables:
+            raise ValueError(f"{system_file} must not depend on the document; it uses {', '.join(sorted(variables))}")
+        document, _, _ = self._env.loader.get_source(self._env, document_file)
+        return Prompt(name, self._env.get_template(document_file), system + document,
+                      system=self._env.from_string(system).render())
+
+    def with_layout(self, prompt, layout="inline"):
+        """The variant of a prompt for the given layout (one of PROMPT_LAYOUTS)."""
+        if layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout '{layout}'; use one of {', '.join(PROMPT_LAYOUTS)}")
+        base = self._base_name(prompt)
+        return self[base if layout == "inline" else f"{base}_prefix"]
+
+    def packed(self, prompt):
+        """The variant of a prompt that takes a list of (filename, text) documents."""
+        return self[f"{self._base_name(prompt)}_packed"]
+
+    @staticmethod
+    def _base_name(prompt):
+        return prompt.name.removesuffix("_prefix").removesuffix("_packed")
+
+    def render(self, name, **context):
+        return self[name].render(**context)
+
+    def version(self, name):
+        return self[name].version
+
+    def names(self):
+        return list(self.files)
+
+
+PROMPTS = PromptRegistry()
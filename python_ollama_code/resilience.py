@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import random
+import asyncio
+import httpx
+from ollama import ResponseError
+
+DEAD_LETTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "dead_letter.jsonl")
+
+# HTTP statuses an overloaded or restarting Ollama host answers with
+OVERLOAD_STATUSES = {429, 502, 503, 504}
+
+
+class RetryPolicy:
+    """
+    How often and how patiently a chat request is retried.
+    max_attempts counts the first try; delays grow as base_delay * 2**n up to
+    max_delay, with up to jitter * delay added so workers do not retry in lockstep.
+    parse_retries bounds the extra requests made for an unparseable response.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0, jitter=0.25, parse_retries=1):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.parse_retries = parse_retries
+
+    def delay(self, attempt):
+        """Seconds to wait after the given failed attempt (1-based)."""
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        return delay + random.uniform(0, self.jitter * delay)
+
+
+DEFAULT_POLICY = RetryPolicy()
+NO_RETRY = RetryPolicy(max_attempts=1, parse_retries=0)
+
+# Errors a chat request can end with once retries are exhausted
+REQUEST_ERRORS = (ResponseError, httpx.HTTPError, asyncio.TimeoutError, ConnectionError)
+
+
+def classify_error(error):
+    """
+    Sorts a failed request into "overload" (host busy, back off), "transient"
+    (connection or timeout, try again) or "fatal" (retrying will not help).
+    """
+    if isinstance(error, ResponseError):
+        return "overload" if error.status_code in OVERLOAD_STATUSES else "fatal"
+    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException, httpx.TransportError, ConnectionError)):
+        return "transient"
+    return "fatal"
+
+
+async def call_with_retries(request, policy=NO_RETRY, label=""):
+    """
+    Awaits request() until it succeeds, backing off between overload and transient
+    failures. The last error is re-raised once attempts run out or it is fatal.
+    """
+    attempt = 1
+    while True:
+        try:
+            return await request()
+        except Exception as e:
+            kind = classify_error(e)
+            if kind == "fatal" or attempt >= policy.max_attempts:
+                raise
+            delay = policy.delay(attempt)
+            print(f"{label}: {kind} error ({type(e).__name__}: {e}), "
+                  f"retry {attempt}/{policy.max_attempts - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+def describe_error(error):
+    """Short message for an error that ended a request."""
+    if isinstance(error, asyncio.TimeoutError):
+        return "timed out"
+    if isinstance(error, ResponseError):
+        return f"Ollama error {error.status_code}: {error.error}"
+    return f"{type(error).__name__}: {error}"
+
+
+class DeadLetter:
+    """
+    JSONL file of documents that still failed after every retry, one line per
+    document, so that they can be inspected or re-run on their own.
+    The file is only created once something fails.
+    """
+
+    def __init__(self, path=DEAD_LETTER_PATH):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def record(self, row):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "filename": row["filename"],
+            "model": row.get("model"),
+            "options_hash": row.get("options_hash"),
+            "prompt_version": row.get("prompt_version"),
+            "error": row.get("error"),
+            "raw_response": row.get("raw_response"),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def report(self):
+        if self.count:
+            print(f"{self.count} failed document(s) written to {self.path}")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite")
+# Least recently used entries are evicted once the stored responses exceed this size
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def cache_key(model, prompt, options=None, output_format=None):
+    """Hashes everything that determines a model response."""
+    request = {"model": model, "prompt": prompt, "options": options or {}}
+    # Only constrained requests carry a format, so unconstrained keys are unchanged
+    if output_format is not None:
+        request["format"] = output_format
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cacheable(options=None):
+    """
+    Whether responses to requests with these options may be replayed: only greedy
+    (temperature 0) or seeded sampling gives the same answer twice. Without options
+    the server samples at its default temperature.
+    """
+    options = options or {}
+    return options.get("temperature") == 0 or options.get("seed") is not None
+
+
+class ResponseCache:
+    """Persistent SQLite cache of raw model responses with size-based LRU eviction."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Requests that skipped the cache because their response is not reproducible
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT,"
+            " size INTEGER, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """Returns the cached response for key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def bypass(self):
+        """Counts a request sent without looking at the cache, as it is not cacheable."""
+        with self._lock:
+            self.bypassed += 1
+
+    def put(self, key, model, response):
+        """Stores a response and evicts old entries if the cache grew too large."""
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            stale.append((key,))
+            self._total_bytes -= size
+            if self._total_bytes <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def invalidate(self, model=None):
+        """Removes all entries, or only those of one model."""
+        with self._lock:
+            if model is None:
+                self._conn.execute("DELETE FROM responses")
+            else:
+                self._conn.execute("DELETE FROM responses WHERE model = ?", (model,))
+            self._total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def stats(self):
+        """Returns hit/miss/bypass counters and the current cache size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def report(self):
+        stats = self.stats()
+        if not stats["hits"] + stats["misses"] and stats["bypassed"]:
+            print(f"Response cache: not used, the run was not cacheable ({stats['bypassed']} sampled request(s) "
+                  f"without temperature 0 or a seed; use --temperature-zero or --seed)")
+            return
+        print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries, "
+              f"{stats['bytes'] / 1024 / 1024:.1f} MiB"
+              + (f", {stats['bypassed']} request(s) not cacheable" if stats["bypassed"] else ""))
+
+    def close(self):
+        self._conn.close()
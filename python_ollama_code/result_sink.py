@@ -0,0 +1,198 @@
+import os
+import csv
+import sys
+import json
+import atexit
+import signal
+import hashlib
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Counters Ollama reports in the final message of a response; durations are in nanoseconds
+TIMING_FIELDS = ["total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+                 "eval_count", "eval_duration"]
+# Columns written for every prediction, whatever the output format
+RESULT_COLUMNS = ["filename", "number_of_people", "model", "options_hash", "prompt_version", "latency",
+                  "ttft", "time_to_answer", "chunks", "pack", "source", "raw_response", "error"] + TIMING_FIELDS
+# Rows kept in memory before they are written out
+BATCH_SIZE = 50
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet"}
+
+_open_sinks = set()
+
+
+def options_hash(options):
+    """Short stable hash of a sampling options dict."""
+    payload = json.dumps(options or {}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def with_format(path, fmt):
+    """Swaps the extension of path for the given output format."""
+    if fmt is None:
+        return path
+    return os.path.splitext(path)[0] + "." + fmt
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade_csv(path, columns):
+    """
+    Makes an existing CSV hold at least the given columns, so rows appended to it keep
+    every field. A file written with fewer columns (such as the older two-column
+    outputs) is rewritten in place with the missing ones left empty; columns only the
+    file has are kept after them. Returns the file's columns.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        header = next(csv.reader(file))
+    missing = [column for column in columns if column not in header]
+    if not missing:
+        return header
+
+    merged = list(columns) + [column for column in header if column not in columns]
+    temporary = path + ".tmp"
+    with open(path, "r", encoding="utf-8", newline="") as source, \
+            open(temporary, "w", encoding="utf-8", newline="") as target:
+        writer = csv.DictWriter(target, fieldnames=merged)
+        writer.writeheader()
+        writer.writerows(csv.DictReader(source))
+    os.replace(temporary, path)
+    print(f"Upgraded {path} to the full result layout ({len(missing)} column(s) added)")
+    return merged
+
+
+class ResultSink:
+    """
+    Buffers prediction rows and writes them in batches to CSV, JSONL or Parquet.
+    CSV and JSONL are appended to; Parquet is written to a temporary file and
+    moved into place on close. With atomic=True every format replaces the
+    target only once the sink is closed. Safe to share between workers.
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE, columns=RESULT_COLUMNS, atomic=False):
+        self.path = path
+        self.format = FORMATS.get(os.path.splitext(path)[1].lower())
+        if self.format is None:
+            raise ValueError(f"Unsupported output format for {path}; use one of {', '.join(FORMATS)}")
+        if self.format == "parquet" and pa is None:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow).")
+
+        self.batch_size = batch_size
+        self.columns = list(columns)
+        self.atomic = atomic or self.format == "parquet"
+        self.rows_written = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._writer = None
+        self._closed = False
+
+        self._target = path
+        if self.atomic:
+            directory, name = os.path.split(os.path.abspath(path))
+            self._target = os.path.join(directory, f".tmp_{os.getpid()}_{id(self)}_{name}")
+        elif self.format == "csv" and os.path.exists(path) and os.path.getsize(path) > 0:
+            self.columns = upgrade_csv(path, self.columns)
+
+        _open_sinks.add(self)
+
+    def add(self, row):
+        """Queues one row, flushing when the batch is full."""
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        rows = [{column: row.get(column) for column in self.columns} for row in self._buffer]
+        self._buffer = []
+
+        if self.format == "csv":
+            write_header = not os.path.exists(self._target) or os.path.getsize(self._target) == 0
+            with open(self._target, "a", encoding="utf-8", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=self.columns)
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(rows)
+        elif self.format == "jsonl":
+            with open(self._target, "a", encoding="utf-8") as file:
+                for row in rows:
+                    file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            for row in rows:
+                if "number_of_people" in row:
+                    row["number_of_people"] = _to_number(row["number_of_people"])
+            table = pa.Table.from_pylist(rows, schema=self._parquet_schema())
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._target, table.schema)
+            self._writer.write_table(table)
+
+        self.rows_written += len(rows)
+
+    def _parquet_schema(self):
+        types = {"number_of_people": pa.float64(), "latency": pa.float64(), "ttft": pa.float64(),
+                 "time_to_answer": pa.float64(), "chunks": pa.int64(), "pack": pa.int64(),
+                 **{field: pa.int64() for field in TIMING_FIELDS}}
+        return pa.schema([(column, types.get(column, pa.string())) for column in self.columns])
+
+    def _write_empty(self):
+        # An empty run still replaces the target with a valid, header-only file
+        if self.format == "csv":
+            with open(self._target, "w", encoding="utf-8", newline="") as file:
+                csv.writer(file).writerow(self.columns)
+        elif self.format == "jsonl":
+            open(self._target, "w").close()
+        else:
+            self._writer = pq.ParquetWriter(self._target, self._parquet_schema())
+
+    def close(self):
+        """Flushes pending rows and, for atomic sinks, moves the file into place."""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._closed = True
+            if self.atomic and self.rows_written == 0:
+                self._write_empty()
+            if self._writer is not None:
+                self._writer.close()
+            if self.atomic:
+                os.replace(self._target, self.path)
+        _open_sinks.discard(self)
+        print(f"Saved {self.rows_written} rows to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def close_all():
+    """Flushes every sink that is still open."""
+    for sink in list(_open_sinks):
+        sink.close()
+
+
+def install_signal_handlers():
+    """Turns SIGTERM into SystemExit so that pending rows are flushed on shutdown."""
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+
+atexit.register(close_all)
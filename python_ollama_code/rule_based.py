@@ -0,0 +1,137 @@
+import os
+import re
+import sys
+import html
+
+# One-words are left out on purpose: "on était une belle équipe" is not a count
+NUMBER_WORDS = {
+    "deux": 2, "trois": 3, "quatre": 4, "cinq": 5, "six": 6, "sept": 7,
+    "huit": 8, "neuf": 9, "dix": 10, "onze": 11, "douze": 12,
+    "two": 2, "three": 3, "four": 4, "five": 5, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+NUMBER = r"(\d{1,2}|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")\b"
+# A count must not be followed by a unit, an hour, an idiom such as "à deux pas" or a
+# group noun: "nous étions 2 cordées de 3" counts ropes, not people
+NOT_A_UNIT = (r"(?!\s*(?:h(?:\b|\d)|heures?|min|m\b|km|kms|mètres|metres|%|°|ème|e\b|er\b|jours?|days?|hours?"
+              r"|pas\b|reprises|(?:cordées?|groupes?|équipes?|voitures?|groups?|teams?|ropes?|cars?)\b|\d))")
+
+# Explicit statements about the writer's own group, French then English.
+# Each pattern captures one count; the fixed-count ones use a constant instead.
+COUNT_PATTERNS = [
+    ("fr_etions", r"\b(?:nous|on)\s+(?:étions|était|etait|sommes|est)\s+(?:partis?\s+)?(?:à\s+)?"
+                  + NUMBER + NOT_A_UNIT),
+    ("fr_partis_a", r"\b(?:partis?|montés?|sortie|rando(?:nnée)?|virée)\s+à\s+" + NUMBER + NOT_A_UNIT),
+    # "À 3, on a ..." at the start of a sentence
+    ("fr_a_debut", r"(?:^|[.!?]\s+)à\s+" + NUMBER + r"\s*,"),
+    ("fr_groupe_de", r"\b(?:groupe|équipe|bande)\s+de\s+" + NUMBER + NOT_A_UNIT),
+    ("fr_au_total", r"\b" + NUMBER + r"\s+(?:personnes|participants|skieurs)\s+au\s+total"),
+    ("en_we_were", r"\bwe\s+were\s+" + NUMBER + NOT_A_UNIT),
+    ("en_of_us", r"\b(?:there\s+were\s+)?" + NUMBER + r"\s+of\s+us\b"),
+    ("en_group_of", r"\b(?:group|party|team)\s+of\s+" + NUMBER + NOT_A_UNIT),
+]
+FIXED_PATTERNS = [
+    ("solo", r"\b(?:je\s+suis\s+(?:parti|monté|allé)e?\s+seule?|sortie\s+en\s+solo|en\s+solitaire"
+             r"|i\s+went\s+(?:alone|solo)|skied\s+(?:alone|solo))\b", 1),
+    ("duo", r"\ben\s+duo\b|\bà\s+deux\b" + NOT_A_UNIT, 2),
+    ("trio", r"\ben\s+trio\b|\bà\s+trois\b" + NOT_A_UNIT, 3),
+]
+# Mentions of people leaving or joining make a single stated number unreliable
+AMBIGUOUS = re.compile(
+    r"\b(?:nous\s+(?:a|ont)\s+(?:quitt|rejoint)|fait\s+demi-tour|redescend\w*\s+seul|abandonn|nous\s+rejoi"
+    r"|left\s+us|turned\s+back|joined\s+us)", re.IGNORECASE)
+
+MAX_COUNT = 30
+
+# Phrasings the rules must resolve (or leave to the LLM, None), checked by running this module
+EXAMPLES = [
+    ("Nous étions 4 au départ du parking.", 4),
+    ("On est partis à 3 vers 7h.", 3),
+    ("Sortie à 3 sous un grand soleil.", 3),
+    ("À 3, on attaque la montée.", 3),
+    ("Belle journée en duo avec Marc.", 2),
+    ("We were five on the ridge.", 5),
+    ("There were 3 of us at the hut.", 3),
+    ("Je suis parti seul ce matin.", 1),
+    ("Nous étions 2 cordées de 3.", None),
+    ("Nous étions 4, Paul nous a rejoint au col.", None),
+    ("Départ à 7h, nous étions à 3000m à midi.", None),
+    ("Nous étions moins de 20 personnes à monter.", None),
+]
+
+_COUNT_REGEXES = [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern in COUNT_PATTERNS]
+_FIXED_REGEXES = [(name, re.compile(pattern, re.IGNORECASE), count) for name, pattern, count in FIXED_PATTERNS]
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def _to_count(token):
+    token = token.lower()
+    return int(token) if token.isdigit() else NUMBER_WORDS.get(token)
+
+
+def find_group_counts(text):
+    """Returns every (rule, count, matched text) found in a report."""
+    text = html.unescape(_TAGS.sub(" ", text))
+    found = []
+    for name, regex in _COUNT_REGEXES:
+        for match in regex.finditer(text):
+            found.append((name, _to_count(match.group(1)), match.group(0)))
+    for name, regex, count in _FIXED_REGEXES:
+        for match in regex.finditer(text):
+            found.append((name, count, match.group(0)))
+    return found
+
+
+def extract_rule_based(text):
+    """
+    Resolves a report locally when it states the group size without ambiguity.
+    Returns {"number_of_people", "rule", "match"} or None to defer to the LLM.
+    """
+    if AMBIGUOUS.search(text):
+        return None
+
+    found = [(name, count, match) for name, count, match in find_group_counts(text)
+             if count is not None and 1 <= count <= MAX_COUNT]
+    # Every statement has to agree on one number
+    if not found or len({count for _, count, _ in found}) != 1:
+        return None
+
+    name, count, match = found[0]
+    return {"number_of_people": count, "rule": name, "match": match.strip()}
+
+
+def self_check(documents=None, index=None):
+    """
+    Checks the rules against EXAMPLES and, when given documents, reports how many of
+    them the rules resolve and how many of those match the ground truth index.
+    Returns the examples that failed.
+    """
+    failures = []
+    for text, expected in EXAMPLES:
+        rule = extract_rule_based(text)
+        count = rule["number_of_people"] if rule else None
+        if count != expected:
+            failures.append(text)
+            print(f"{text!r}: expected {expected}, got {count}")
+    print(f"{len(EXAMPLES) - len(failures)} of {len(EXAMPLES)} example(s) resolved as expected")
+
+    if documents is not None:
+        resolved = {}
+        for filename, text in documents:
+            rule = extract_rule_based(text)
+            if rule is not None:
+                resolved[filename] = rule["number_of_people"]
+        line = f"Corpus: {len(resolved)} of {len(documents)} document(s) resolved"
+        if index is not None and resolved:
+            matching = int((index.align(list(resolved)) == list(resolved.values())).sum())
+            line += f", {matching} matching the ground truth"
+        print(line)
+    return failures
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from async_extraction import load_documents
+    from ground_truth_index import GroundTruthIndex
+
+    sys.exit(1 if self_check(load_documents(), GroundTruthIndex.load()) else 0)
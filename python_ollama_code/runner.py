@@ -0,0 +1,273 @@
+import os
+import sys
+import asyncio
+import argparse
+from prompt_registry import PROMPTS, PROMPT_LAYOUTS
+from response_cache import ResponseCache
+from checkpoint import Checkpoint
+from client_pool import ClientPool, make_client
+from resilience import DEAD_LETTER_PATH, DEFAULT_POLICY, RetryPolicy, DeadLetter
+from chunking import MAX_NUM_CTX, plan_chunks
+from result_sink import BATCH_SIZE, with_format, install_signal_handlers
+from async_extraction import (DATA_FOLDER, MAX_CONCURRENCY, REQUEST_TIMEOUT, NUM_PREDICT, load_documents,
+                              process_txt_files)
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# One entry per extraction run. "output" is relative to the repository root,
+# "prompt" is a prompt_registry name.
+MODEL_MATRIX = [
+    {"name": "deepseek", "model": "deepseek-r1", "prompt": "en", "options": None,
+     "output": "python_ollama_code/deepseek_output.csv"},
+    {"name": "gemma_2B", "model": "gemma2:2b", "prompt": "en", "options": None,
+     "output": "python_ollama_code/gemma_2B_output.csv"},
+    {"name": "gemma_9B", "model": "gemma2", "prompt": "en", "options": None,
+     "output": "python_ollama_code/gemma_9B_output.csv"},
+    {"name": "llama_1B", "model": "llama3.2:1b", "prompt": "en", "options": None,
+     "output": "python_ollama_code/llama_1B_output.csv"},
+    {"name": "llama_3B", "model": "llama3.2:3b", "prompt": "en", "options": None,
+     "output": "python_ollama_code/llama_3B_output.csv"},
+    {"name": "llama_8B", "model": "llama3.1:8b", "prompt": "en", "options": None,
+     "output": "python_ollama_code/llama_8B_output.csv"},
+    {"name": "mistral", "model": "mistral", "prompt": "en", "options": None,
+     "output": "python_ollama_code/mistral_output.csv"},
+    {"name": "mistral_fr", "model": "mistral", "prompt": "fr", "options": None,
+     "output": "python_ollama_code/mistral_fr_output.csv"},
+    {"name": "mixtral", "model": "mixtral:8x7b", "prompt": "en", "options": None,
+     "output": "python_ollama_code/mixtral_output.csv"},
+    {"name": "mixtral_fr", "model": "mixtral:8x7b", "prompt": "fr", "options": None,
+     "output": "python_ollama_code/mixtral_fr_output.csv"},
+    {"name": "phi4", "model": "phi4", "prompt": "en_compact", "options": None,
+     "output": "python_ollama_code/phi4_output.csv"},
+    {"name": "phi3,5", "model": "phi3.5", "prompt": "en_compact", "options": None,
+     "output": "python_ollama_code/phi3,5_output.csv"},
+    {"name": "phi3_medium", "model": "phi3:medium", "prompt": "en_compact", "options": None,
+     "output": "python_ollama_code/phi3_medium_output.csv"},
+    # mistral_params: sampling option experiments
+    {"name": "mistral_params", "model": "mistral", "prompt": "en",
+     "options": {"temperature": 0.7, "top_k": 50, "top_p": 0.85, "repeat_penalty": 1.1},
+     "output": "mistral_params/mistral_output.csv"},
+    {"name": "mistral1", "model": "mistral", "prompt": "en",
+     "options": {"temperature": 0.2, "top_k": 20, "top_p": 0.5, "repeat_penalty": 1.2},
+     "output": "mistral_params/mistral1_output.csv"},
+    {"name": "mistral2", "model": "mistral", "prompt": "en",
+     "options": {"temperature": 0.7, "top_k": 50, "top_p": 0.85, "repeat_penalty": 1.1},
+     "output": "mistral_params/mistral2_output.csv"},
+    {"name": "mistral3", "model": "mistral", "prompt": "en",
+     "options": {"temperature": 1.0, "top_k": 80, "top_p": 0.95, "repeat_penalty": 1.0},
+     "output": "mistral_params/mistral3_output.csv"},
+    {"name": "mistral4", "model": "mistral", "prompt": "en",
+     "options": {"temperature": 0.2, "top_k": 20, "top_p": 0.5, "repeat_penalty": 1.2},
+     "output": "mistral_params/mistral4_output.csv"},
+]
+
+
+def select_specs(names=None, matrix=MODEL_MATRIX):
+    """Returns the matrix entries matching the given run names, in matrix order."""
+    if not names:
+        return list(matrix)
+
+    unknown = set(names) - {spec["name"] for spec in matrix}
+    if unknown:
+        raise ValueError(f"Unknown run name(s): {', '.join(sorted(unknown))}")
+    return [spec for spec in matrix if spec["name"] in names]
+
+
+def resolve_output(spec, output_format=None):
+    """Returns the absolute output path of a matrix entry, optionally in another format."""
+    return with_format(os.path.normpath(os.path.join(ROOT_DIR, spec["output"])), output_format)
+
+
+async def run_spec(spec, documents, client, checkpoint=None, output_format=None, **engine_options):
+    """
+    Runs a single matrix entry over the preloaded corpus.
+    With a checkpoint, documents already done are skipped, every new success is
+    journaled, and the output file is rewritten atomically without duplicates.
+    engine_options are passed on to async_extraction.process_txt_files.
+    """
+    print(f"Running {spec['name']} ({spec['model']}, prompt={spec['prompt']})...")
+    output_path = resolve_output(spec, output_format)
+    on_result = None
+
+    if checkpoint is not None:
+        total = len(documents)
+        documents = checkpoint.pending(spec["name"], documents)
+        print(f"{spec['name']}: {total - len(documents)} document(s) already done, {len(documents)} to go")
+
+        def on_result(row):
+            # Failed documents stay pending so that a restart retries them
+            if not row["error"]:
+                checkpoint.record(spec["name"], spec["model"], row)
+
+    results = await process_txt_files(
+        spec["model"], None if checkpoint is not None else output_path,
+        prompt_template=PROMPTS[spec["prompt"]],
+        options=spec["options"],
+        documents=documents,
+        client=client,
+        on_result=on_result,
+        **engine_options,
+    )
+
+    if checkpoint is not None:
+        checkpoint.write_output(spec["name"], output_path)
+    return results
+
+
+async def run_matrix(specs, data_folder=DATA_FOLDER, checkpoint=None, output_format=None, hosts=None,
+                     **engine_options):
+    """
+    Runs every matrix entry in one process, sharing the corpus and the HTTP client.
+    With several hosts, requests are balanced over them by a client_pool.ClientPool.
+    """
+    documents = load_documents(data_folder)
+    client = make_client(hosts)
+
+    results = {}
+    try:
+        for spec in specs:
+            results[spec["name"]] = await run_spec(spec, documents, client, checkpoint, output_format,
+                                                   **engine_options)
+    finally:
+        await close_client(client)
+    return results
+
+
+async def close_client(client):
+    """Stops a pool's health checks and prints its per-host report."""
+    if isinstance(client, ClientPool):
+        await client.close()
+        client.report()
+
+
+def phase_num_ctx(specs, documents, max_num_ctx=MAX_NUM_CTX):
+    """One num_ctx large enough for every run of a model, so the model is loaded only once."""
+    return max(plan_chunks(documents, spec["model"], PROMPTS[spec["prompt"]], max_num_ctx)[0] for spec in specs)
+
+
+def open_cache(no_cache=False, clear_cache=False):
+    """Opens the response cache according to the --no-cache/--clear-cache flags."""
+    if no_cache:
+        return None
+    cache = ResponseCache()
+    if clear_cache:
+        cache.invalidate()
+    return cache
+
+
+def open_checkpoint(resume=False, restart=False):
+    """Opens the run checkpoint according to the --resume/--restart flags."""
+    if not (resume or restart):
+        return None
+    checkpoint = Checkpoint()
+    if restart:
+        checkpoint.clear()
+    return checkpoint
+
+
+def run(names=None, **kwargs):
+    """Synchronous entry point used by the per-model wrapper scripts."""
+    return asyncio.run(run_matrix(select_specs(names), **kwargs))
+
+
+def add_engine_arguments(parser):
+    """Adds the command-line flags shared by the runner and run_scripts.py."""
+    parser.add_argument("names", nargs="*", help="Run names from MODEL_MATRIX (default: all)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--hosts", default=None,
+                        help="Comma-separated Ollama endpoints to balance requests over "
+                             "(default: $OLLAMA_HOSTS or the local server); raise --concurrency to match")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the response cache (used only for temperature-0 or seeded runs)")
+    parser.add_argument("--temperature-zero", action="store_true",
+                        help="Sample greedily (temperature 0), so responses are reproducible and cached")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Fix the sampling seed, so responses are reproducible and cached")
+    parser.add_argument("--clear-cache", action="store_true", help="Empty the response cache before running")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip documents completed by an earlier run and write deduplicated outputs")
+    parser.add_argument("--restart", action="store_true",
+                        help="Like --resume, but forget the previous checkpoint first")
+    parser.add_argument("--output-format", choices=["csv", "jsonl", "parquet"],
+                        help="Write outputs in this format instead of the matrix's .csv")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="Rows buffered before they are written out")
+    parser.add_argument("--no-chunking", action="store_true",
+                        help="Send whole texts with the server's default num_ctx")
+    parser.add_argument("--max-num-ctx", type=int, default=MAX_NUM_CTX,
+                        help="Upper bound for the num_ctx chosen per run")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="Answer reports that state the group size explicitly without the LLM")
+    parser.add_argument("--validate-prefilter", action="store_true",
+                        help="Send prefiltered reports to the LLM anyway and report agreement")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream responses and stop generation once the JSON answer is complete")
+    parser.add_argument("--num-predict", type=int, default=NUM_PREDICT,
+                        help="Maximum number of tokens generated per request")
+    parser.add_argument("--structured", action="store_true",
+                        help="Constrain responses to the answer JSON schema through Ollama's format parameter")
+    parser.add_argument("--retries", type=int, default=DEFAULT_POLICY.max_attempts - 1,
+                        help="Retries with exponential backoff after connection or overload errors")
+    parser.add_argument("--parse-retries", type=int, default=DEFAULT_POLICY.parse_retries,
+                        help="Extra requests made for a response that cannot be parsed")
+    parser.add_argument("--dead-letter", default=DEAD_LETTER_PATH,
+                        help="JSONL file listing documents that failed after all retries")
+    parser.add_argument("--prompt-layout", choices=PROMPT_LAYOUTS, default="inline",
+                        help="prefix: send the instructions as a fixed system message the server can cache")
+    parser.add_argument("--pack-size", type=int, default=None,
+                        help="Send up to this many documents per request, as many as fit num_ctx")
+
+
+def engine_options(args):
+    """Maps parsed flags to keyword arguments of process_txt_files."""
+    return {
+        "concurrency": args.concurrency,
+        "timeout": args.timeout,
+        "batch_size": args.batch_size,
+        "chunking": not args.no_chunking,
+        "max_num_ctx": args.max_num_ctx,
+        "prefilter": args.prefilter or args.validate_prefilter,
+        "validate_prefilter": args.validate_prefilter,
+        "stream": args.stream,
+        "num_predict": args.num_predict,
+        "structured": args.structured,
+        "retry_policy": RetryPolicy(max_attempts=args.retries + 1, parse_retries=args.parse_retries),
+        "dead_letter": DeadLetter(args.dead_letter),
+        "prompt_layout": args.prompt_layout,
+        "pack_size": args.pack_size,
+        "temperature": 0 if args.temperature_zero else None,
+        "seed": args.seed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run people-count extraction for a matrix of models.")
+    add_engine_arguments(parser)
+    parser.add_argument("--list", action="store_true", help="List the available run names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for spec in MODEL_MATRIX:
+            print(f"{spec['name']}: {spec['model']} prompt={spec['prompt']} -> {spec['output']}")
+        return
+
+    install_signal_handlers()
+    cache = open_cache(args.no_cache, args.clear_cache)
+    checkpoint = open_checkpoint(args.resume, args.restart)
+    options = engine_options(args)
+    run(args.names, data_folder=args.data_folder, checkpoint=checkpoint, output_format=args.output_format,
+        hosts=args.hosts, cache=cache, **options)
+    if cache is not None:
+        cache.report()
+    options["dead_letter"].report()
+
+
+def run_entry(name, argv=None):
+    """Runs one matrix entry with the other command-line flags; used by the per-run scripts."""
+    main([name] + (sys.argv[1:] if argv is None else list(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import re
+import json
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+class JSONObjectScanner:
+    """
+    Incremental scanner that returns each top-level JSON object as soon as its
+    closing brace arrives, without re-parsing the text seen so far.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, piece):
+        """Consumes a piece of text and returns the objects completed by it."""
+        completed = []
+        for char in piece:
+            if self._depth == 0:
+                if char == "{":
+                    self._buffer = [char]
+                    self._depth = 1
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        completed.append(json.loads("".join(self._buffer)))
+                    except json.JSONDecodeError:
+                        pass
+        return completed
+
+
+class AnswerDetector:
+    """
+    Watches a token stream for the first JSON object holding the answer key.
+    Anything inside a leading <think>...</think> block (deepseek-r1) is ignored,
+    since draft answers in the reasoning are not final.
+    """
+
+    def __init__(self, key="number_of_people"):
+        self.key = key
+        self._scanner = JSONObjectScanner()
+        self._pending = ""
+        self._thinking = None
+
+    def feed(self, piece):
+        """Returns the answer object once it is complete, otherwise None."""
+        text = self._pending + piece
+        self._pending = ""
+
+        if self._thinking is None:
+            stripped = text.lstrip()
+            if len(stripped) < len(THINK_OPEN) and THINK_OPEN.startswith(stripped):
+                # Not enough text yet to tell whether a reasoning block starts
+                self._pending = text
+                return None
+            self._thinking = stripped.startswith(THINK_OPEN)
+
+        if self._thinking:
+            end = text.find(THINK_CLOSE)
+            if end == -1:
+                # Keep a tail in case the closing tag is split across pieces
+                self._pending = text[-len(THINK_CLOSE):]
+                return None
+            self._thinking = False
+            text = text[end + len(THINK_CLOSE):]
+
+        for obj in self._scanner.feed(text):
+            if isinstance(obj, dict) and self.key in obj:
+                return obj
+        return None
+
+
+_THINK_BLOCK = re.compile(re.escape(THINK_OPEN) + r"[\s\S]*?(?:" + re.escape(THINK_CLOSE) + r"|$)")
+
+
+def strip_reasoning(text):
+    """Removes <think>...</think> blocks so that draft answers inside them are not parsed."""
+    return _THINK_BLOCK.sub("", text)
@@ -0,0 +1,138 @@
+import re
+import json
+from collections import Counter, defaultdict
+from streaming import JSONObjectScanner, strip_reasoning
+
+# JSON schema passed as Ollama's format parameter in structured mode; the server
+# then constrains decoding so the response is exactly this object
+ANSWER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "filename": {"type": "string"},
+        "number_of_people": {"type": "integer", "minimum": 0},
+    },
+    "required": ["filename", "number_of_people"],
+}
+# Format of a packed request: one answer object per document
+PACKED_SCHEMA = {"type": "array", "items": ANSWER_SCHEMA}
+
+ANSWER_KEY = "number_of_people"
+
+_CODE_FENCE = re.compile(r"```(?:json)?")
+# Escapes models put in keys (number\_of\_people) and trailing commas before a closing brace
+_BAD_ESCAPE = re.compile(r"\\([_\-#*])")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def _is_answer(obj):
+    return isinstance(obj, dict) and ANSWER_KEY in obj
+
+
+def _is_count(value):
+    if isinstance(value, bool):
+        return False
+    try:
+        return float(value) >= 0
+    except (TypeError, ValueError):
+        return False
+
+
+def _has_count(obj):
+    return _is_answer(obj) and _is_count(obj[ANSWER_KEY])
+
+
+def _clean(text):
+    """Drops reasoning and code fences and undoes common JSON slips."""
+    text = _CODE_FENCE.sub("", strip_reasoning(text))
+    return _TRAILING_COMMA.sub(r"\1", _BAD_ESCAPE.sub(r"\1", text))
+
+
+def _repair(text):
+    """Recovers the answer object from prose, code fences, reasoning and common JSON slips."""
+    for obj in JSONObjectScanner().feed(_clean(text)):
+        if _has_count(obj):
+            return obj
+    return None
+
+
+def parse_answer(output_text):
+    """
+    Parses a model response into the answer dict.
+    The fast path is a single json.loads, which is all a structured response needs;
+    anything else goes through _repair. Only an answer whose count is a non-negative
+    number is accepted; otherwise ValueError is raised so the request can be retried.
+    Returns (answer, "fast" or "repaired").
+    """
+    try:
+        obj = json.loads(output_text)
+        if _has_count(obj):
+            return obj, "fast"
+    except json.JSONDecodeError:
+        pass
+
+    obj = _repair(output_text)
+    if obj is None:
+        raise ValueError("No valid JSON with a numeric number_of_people found in response.")
+    return obj, "repaired"
+
+
+def parse_answers(output_text):
+    """
+    Parses the response to a packed request into a list of answer dicts, with the
+    same fast path and repairs as parse_answer. Returns (answers, "fast" or "repaired").
+    """
+    try:
+        obj = json.loads(output_text)
+        if isinstance(obj, list) and all(_is_answer(item) for item in obj):
+            return obj, "fast"
+    except json.JSONDecodeError:
+        pass
+
+    answers = [obj for obj in JSONObjectScanner().feed(_clean(output_text)) if _is_answer(obj)]
+    if not answers:
+        raise ValueError("No valid JSON with number_of_people found in response.")
+    return answers, "repaired"
+
+
+def match_answers(answers, filenames):
+    """
+    Pairs the answers of a packed response with the documents that were sent.
+    Returns {filename: answer} for each filename that came back with a numeric count;
+    answers for other filenames and repeated answers are ignored.
+    """
+    expected = set(filenames)
+    matched = {}
+    for answer in answers:
+        filename = answer.get("filename")
+        if filename in expected and filename not in matched and _is_count(answer[ANSWER_KEY]):
+            matched[filename] = answer
+    return matched
+
+
+class ParseStats:
+    """Counts fast, repaired and failed parses per model."""
+
+    OUTCOMES = ("fast", "repaired", "failed")
+
+    def __init__(self):
+        self._counts = defaultdict(Counter)
+
+    def record(self, model, outcome):
+        self._counts[model][outcome] += 1
+
+    def counts(self, model):
+        return {outcome: self._counts[model][outcome] for outcome in self.OUTCOMES}
+
+    def report(self, model, since=None):
+        """Prints the counts for a model, minus a snapshot taken with counts() if given."""
+        counts = self.counts(model)
+        if since is not None:
+            counts = {outcome: counts[outcome] - since[outcome] for outcome in self.OUTCOMES}
+        total = sum(counts.values())
+        if not total:
+            return
+        print(f"[{model}] Parsing: {counts['fast']} fast, {counts['repaired']} repaired, "
+              f"{counts['failed']} failed of {total} response(s)")
+
+
+PARSE_STATS = ParseStats()
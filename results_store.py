@@ -0,0 +1,76 @@
+import os
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Scored predictions of every run, partitioned as model=<tag>/run=<name>/
+STORE_DIR = os.path.join(ROOT_DIR, "results", "store")
+RESULTS_FOLDER = os.path.join(ROOT_DIR, "results")
+
+PARTITIONING = ds.partitioning(pa.schema([("model", pa.string()), ("run", pa.string())]), flavor="hive")
+
+
+def write_results(df, model, run, store_dir=STORE_DIR):
+    """
+    Stores the scored rows of one run, replacing what the store held for that
+    (model, run) partition. Other partitions are left untouched, so runs can be
+    written from separate processes.
+    """
+    table = pa.Table.from_pandas(df.assign(model=model, run=run), preserve_index=False)
+    ds.write_dataset(table, store_dir, format="parquet", partitioning=PARTITIONING,
+                     basename_template="part-{i}.parquet", existing_data_behavior="delete_matching")
+
+
+def delete_results(model, run, store_dir=STORE_DIR):
+    """Removes the partition of one run from the store."""
+    condition = (ds.field("model") == model) & (ds.field("run") == run)
+    for fragment in open_store(store_dir).get_fragments(filter=condition):
+        os.remove(fragment.path)
+        directory = os.path.dirname(fragment.path)
+        # Drop the emptied run= and model= directories as well
+        while directory != os.path.abspath(store_dir) and not os.listdir(directory):
+            os.rmdir(directory)
+            directory = os.path.dirname(directory)
+
+
+def open_store(store_dir=STORE_DIR):
+    """The whole store as one pyarrow dataset, read through memory-mapped files."""
+    return ds.dataset(store_dir, format="parquet", partitioning=PARTITIONING,
+                      filesystem=fs.LocalFileSystem(use_mmap=True))
+
+
+def load_results(store_dir=STORE_DIR, models=None, runs=None, columns=None):
+    """
+    Loads the scored rows of every run in one scan, optionally restricted to some
+    models or runs (pushed down to the partition directories). Returns a DataFrame
+    with model and run columns.
+    """
+    if not os.path.isdir(store_dir):
+        raise FileNotFoundError(f"No results store at {store_dir}; run accuracy_script.py first.")
+
+    condition = None
+    for field, values in (("model", models), ("run", runs)):
+        if values is not None:
+            clause = ds.field(field).isin(list(values))
+            condition = clause if condition is None else condition & clause
+    return open_store(store_dir).to_table(columns=columns, filter=condition).to_pandas()
+
+
+def list_runs(store_dir=STORE_DIR):
+    """(model, run) pairs present in the store."""
+    table = open_store(store_dir).to_table(columns=["model", "run"])
+    return sorted(set(zip(table["model"].to_pylist(), table["run"].to_pylist())))
+
+
+def export_excel(store_dir=STORE_DIR, results_folder=RESULTS_FOLDER):
+    """Optional report step: writes results_<run>_output.xlsx per run, as the scripts used to."""
+    df = load_results(store_dir)
+    paths = []
+    for run, run_df in df.groupby("run", sort=True):
+        path = os.path.join(results_folder, f"results_{run}_output.xlsx")
+        run_df.drop(columns=["model", "run"]).to_excel(path, index=False)
+        paths.append(path)
+        print(f"Results exported: {path}")
+    return paths
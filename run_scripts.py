@@ -1,22 +1,124 @@
 import os
+import sys
 import time
-import subprocess
+import asyncio
+import argparse
 
-# Define the folder path
-folder_path = "./python_ollama_code"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_ollama_code"))
+from async_extraction import DATA_FOLDER, load_documents
+from runner import (
+    select_specs, run_spec, phase_num_ctx, open_cache, open_checkpoint, add_engine_arguments, engine_options,
+    close_client,
+)
+from client_pool import make_client
+from chunking import MAX_NUM_CTX
+from result_sink import install_signal_handlers
 
-# Get all Python files in the folder
-python_files = [f for f in os.listdir(folder_path) if f.endswith(".py")]
+# How long Ollama keeps a model loaded between requests of the same phase
+KEEP_ALIVE = "30m"
 
-# Sort files (optional, to ensure order)
-python_files.sort()
 
-# Execute each Python file with a 5-second delay
-for file in python_files:
-    file_path = os.path.join(folder_path, file)
-    print(f"Running {file}...")
-    subprocess.run(["python", file_path])
-    print(f"Finished {file}, waiting 5 seconds...")
-    time.sleep(5)
+def group_by_model(specs):
+    """Groups runs into one contiguous phase per model, in order of first appearance."""
+    phases = {}
+    for spec in specs:
+        phases.setdefault(spec["model"], []).append(spec)
+    return list(phases.items())
 
-print("All scripts executed.")
+
+async def load_model(client, model, keep_alive=KEEP_ALIVE, num_ctx=None):
+    """Pre-warms a model with an empty generate request; returns the load time in seconds."""
+    start = time.perf_counter()
+    options = {"num_ctx": num_ctx} if num_ctx else None
+    await client.generate(model=model, prompt="", keep_alive=keep_alive, options=options)
+    return time.perf_counter() - start
+
+
+async def unload_model(client, model):
+    """Asks Ollama to drop the model from memory right away; returns the time taken."""
+    start = time.perf_counter()
+    await client.generate(model=model, prompt="", keep_alive=0)
+    return time.perf_counter() - start
+
+
+async def run_schedule(specs, data_folder=DATA_FOLDER, keep_alive=KEEP_ALIVE, checkpoint=None,
+                       output_format=None, hosts=None, **engine_options):
+    """
+    Runs every phase with its model kept hot, then unloads it before the next one.
+    With several hosts, every host loads the phase's model and requests are balanced over them.
+    """
+    documents = load_documents(data_folder)
+    client = make_client(hosts)
+    try:
+        timings = await run_phases(client, specs, documents, keep_alive, checkpoint, output_format,
+                                   **engine_options)
+    finally:
+        await close_client(client)
+
+    report_schedule(timings)
+    return timings
+
+
+async def run_phases(client, specs, documents, keep_alive, checkpoint, output_format, **engine_options):
+    """Loads, runs and unloads each model in turn; returns the timings of every phase."""
+    timings = []
+
+    for model, phase_specs in group_by_model(specs):
+        if checkpoint is not None and not any(checkpoint.pending(spec["name"], documents) for spec in phase_specs):
+            print(f"Skipping {model}: all runs already completed.")
+            continue
+
+        # Loading with the phase's num_ctx up front avoids a reload on the first request
+        num_ctx = None
+        if engine_options.get("chunking", True):
+            num_ctx = phase_num_ctx(phase_specs, documents, engine_options.get("max_num_ctx", MAX_NUM_CTX))
+        print(f"Loading {model} for {len(phase_specs)} run(s)...")
+        load_time = await load_model(client, model, keep_alive, num_ctx)
+
+        start = time.perf_counter()
+        for spec in phase_specs:
+            await run_spec(spec, documents, client, checkpoint, output_format, keep_alive=keep_alive,
+                           num_ctx=num_ctx, **engine_options)
+        inference_time = time.perf_counter() - start
+
+        unload_time = await unload_model(client, model)
+        timings.append({"model": model, "runs": len(phase_specs), "load": load_time,
+                        "inference": inference_time, "unload": unload_time})
+    return timings
+
+
+def report_schedule(timings):
+    """Prints load vs inference time per model and the share of the sweep spent swapping."""
+    print(f"{'Model':<16}{'Runs':>6}{'Load (s)':>12}{'Inference (s)':>16}{'Unload (s)':>12}")
+    for row in timings:
+        print(f"{row['model']:<16}{row['runs']:>6}{row['load']:>12.2f}"
+              f"{row['inference']:>16.2f}{row['unload']:>12.2f}")
+
+    swap = sum(row["load"] + row["unload"] for row in timings)
+    total = swap + sum(row["inference"] for row in timings)
+    if total > 0:
+        print(f"Total {total:.2f}s, of which {swap:.2f}s ({swap / total:.1%}) loading/unloading models.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the extraction matrix one model at a time.")
+    add_engine_arguments(parser)
+    parser.add_argument("--keep-alive", default=KEEP_ALIVE,
+                        help="Ollama keep_alive while a model's phase is running")
+    args = parser.parse_args(argv)
+
+    install_signal_handlers()
+    cache = open_cache(args.no_cache, args.clear_cache)
+    checkpoint = open_checkpoint(args.resume, args.restart)
+    options = engine_options(args)
+    asyncio.run(run_schedule(select_specs(args.names), data_folder=args.data_folder,
+                             keep_alive=args.keep_alive, checkpoint=checkpoint,
+                             output_format=args.output_format, hosts=args.hosts, cache=cache, **options))
+    if cache is not None:
+        cache.report()
+    options["dead_letter"].report()
+    print("All scripts executed.")
+
+
+if __name__ == "__main__":
+    main()